@@ -1,8 +1,19 @@
+import bisect
 import functools
 import math
+import weakref
+from fractions import Fraction
 
+import numpy
+from scipy.sparse import csr_matrix
+
+from cyy_numerical_analysis.piecewise_polynomial import PiecewisePolynomial
 from cyy_numerical_analysis.polynomial import Polynomial
 
+# Up to this spline degree the symbolic evaluation uses floats, above it the common
+# factors must cancel exactly for the limits to be taken, so fractions are used.
+FLOAT_SIMPLIFICATION_MAX_DEGREE = 3
+
 
 def limit(expr) -> float:
     match expr:
@@ -19,11 +30,13 @@ def limit(expr) -> float:
                 q_coefficients = q_coefficients[1:]
             assert p_coefficients and q_coefficients
             if q_coefficients[0] != 0:
-                return p_coefficients[0] / q_coefficients[0]
-            # deal with numerical errors
+                return float(p_coefficients[0] / q_coefficients[0])
+            # deal with numerical errors, which are relative to the size of the
+            # coefficients
+            tolerance = 1e-12 * max(abs(c) for c in p_coefficients)
             while (
                 p_coefficients
-                and abs(p_coefficients[0]) < 1e-20
+                and abs(p_coefficients[0]) <= tolerance
                 and q_coefficients
                 and q_coefficients[0] == 0
             ):
@@ -31,20 +44,28 @@ def limit(expr) -> float:
                 q_coefficients = q_coefficients[1:]
             assert p_coefficients and q_coefficients
             if q_coefficients[0] != 0:
-                return p_coefficients[0] / q_coefficients[0]
+                return float(p_coefficients[0] / q_coefficients[0])
             raise RuntimeError(f"failed to take limit of {expr}")
     raise RuntimeError(f"failed to take limit of {expr}")
 
 
-def simplify(expr) -> tuple[Polynomial, Polynomial]:
-    """simplify expression"""
+def simplify(expr, exact: bool = True) -> tuple[Polynomial, Polynomial]:
+    """simplify expression. If exact is true, the coefficients are kept as fractions so
+    that common factors cancel exactly, otherwise only the common powers of the
+    variable are cancelled."""
+    number = Fraction if exact else float
     match expr:
         case int() | float():
-            return (Polynomial([expr]), Polynomial([1]))
+            # parameters are not interned, they would crowd the knots out of the table
+            return (Polynomial([number(expr)]), Polynomial.interned([number(1)]))
         case Polynomial():
-            return (expr, Polynomial([1]))
+            # the polynomials are knots
+            return (
+                Polynomial.interned([number(c) for c in expr.coefficients]),
+                Polynomial.interned([number(1)]),
+            )
         case (op, a, b):
-            expr = (op, simplify(a), simplify(b))
+            expr = (op, simplify(a, exact), simplify(b, exact))
     match expr:
         case (op, (p1, q1), (p2, q2)):
             match op:
@@ -68,14 +89,42 @@ def simplify(expr) -> tuple[Polynomial, Polynomial]:
             ):
                 p_coefficients = p_coefficients[1:]
                 q_coefficients = q_coefficients[1:]
-            if not p_coefficients:
-                p_coefficients = [0]
-            expr = (Polynomial(p_coefficients), Polynomial(q_coefficients))
+            if not p_coefficients or all(c == 0 for c in p_coefficients):
+                return (
+                    Polynomial.interned([number(0)]),
+                    Polynomial.interned([number(1)]),
+                )
+            if not exact:
+                return (Polynomial(p_coefficients), Polynomial(q_coefficients))
+            # Cancel the common factors to keep the degrees bounded. The powers of the
+            # variable are split off before and restored after the division, so they are
+            # still visible to limit.
+            p_order = next(i for i, c in enumerate(p_coefficients) if c != 0)
+            q_order = next(i for i, c in enumerate(q_coefficients) if c != 0)
+            p = Polynomial(p_coefficients[p_order:])
+            q = Polynomial(q_coefficients[q_order:])
+            if p.degree() > 0 and q.degree() > 0:
+                divisor = p.gcd(q)
+                if divisor.degree() > 0:
+                    p = p // divisor
+                    q = q // divisor
+            # scale both to integer coefficients without common divisors
+            coefficients = p.coefficients + q.coefficients
+            scale = Fraction(
+                math.lcm(*(c.denominator for c in coefficients)),
+                math.gcd(*(c.numerator for c in coefficients)),
+            )
+            p = p * scale
+            q = q * scale
+            expr = (
+                Polynomial([0] * p_order + list(p.coefficients)),
+                Polynomial([0] * q_order + list(q.coefficients)),
+            )
     return expr
 
 
 class KnotVector:
-    def __init__(self, knot_vector: list, degree):
+    def __init__(self, knot_vector: list, degree, cache_size: int | None = 1000):
         # if there are multiple points, add an epsilon to them, but we start from knot_vector[degree], because if knot_vector are all zeros and we start from knot_vector[0], then knot_vector[degree] would be greater than zero, and t=0 would be out of range.
         epsilon_cnts = [0] * len(knot_vector)
         for i in range(degree, len(knot_vector) - 1):
@@ -93,20 +142,51 @@ class KnotVector:
         self.__knot_vector = knot_vector
         self.__epsilon_cnts = epsilon_cnts
         self.__degree = degree
+        self.__simplify = functools.partial(
+            simplify, exact=degree > FLOAT_SIMPLIFICATION_MAX_DEGREE
+        )
+        # The cache belongs to this instance, so it is bounded per knot vector. It only
+        # refers to the instance weakly, so both are freed without the cyclic collector.
+        instance = weakref.ref(self)
+        evaluate = KnotVector.__evaluate_base_function_derivative
+        self.__evaluate_base_function_derivative = functools.lru_cache(cache_size)(
+            lambda *args, **kwargs: evaluate(instance(), *args, **kwargs)
+        )
+        # knots with epsilons are strictly increasing in the lexicographic order of
+        # (knot, epsilon)
+        self.__sorted_knots: list[tuple] = list(
+            zip(knot_vector, epsilon_cnts, strict=True)
+        )
+        # For a float parameter t, searchsorted(keys, t, side="right") on these keys
+        # equals bisect_left and bisect_right on (t, 0) respectively.
+        knots = numpy.asarray(knot_vector, dtype=numpy.float64)
+        epsilons = numpy.asarray(epsilon_cnts)
+        self.__knot_array = knots
+        self.__bisect_left_keys = numpy.where(
+            epsilons < 0, knots, numpy.nextafter(knots, numpy.inf)
+        )
+        self.__bisect_right_keys = numpy.where(
+            epsilons <= 0, knots, numpy.nextafter(knots, numpy.inf)
+        )
 
     def __len__(self):
         return len(self.__knot_vector)
 
+    def cache_info(self):
+        """hits, misses, maxsize and currsize of the cache of this instance"""
+        return self.__evaluate_base_function_derivative.cache_info()
+
+    def cache_clear(self) -> None:
+        self.__evaluate_base_function_derivative.cache_clear()
+
     def get_raw_kot_vector(self):
         return self.__knot_vector
 
     def get_knot(self, idx) -> Polynomial:
-        return Polynomial(
-            coefficients=(self.__knot_vector[idx], self.__epsilon_cnts[idx])
-        )
+        return Polynomial.interned((self.__knot_vector[idx], self.__epsilon_cnts[idx]))
 
     def get_knot_coefficients(self, idx) -> tuple:
-        return (self.get_knot(idx).coefficients + (0,))[:2]
+        return self.__sorted_knots[idx]
 
     def in_interval(self, t, index) -> bool:
         left_endpoint = self.get_knot_coefficients(index)
@@ -121,11 +201,121 @@ class KnotVector:
         return left_endpoint <= parameter < right_endpoint
 
     def get_parameter_index(self, t, point_num):
-        for i in range(self.__degree, point_num + 2):
-            if self.in_interval(t, index=i):
-                return i
+        return self.find_span(t, last_index=point_num + 1)
+
+    def find_span(
+        self, t, last_index: int | None = None, right_closed: bool = False
+    ) -> int:
+        """Find by binary search the first index i in [degree, last_index] such that t
+        is in [knot(i), knot(i+1)), or in [knot(i), knot(i+1)] if right_closed is
+        true"""
+        if last_index is None:
+            last_index = len(self) - 2
+        parameter = None
+        match t:
+            case Polynomial():
+                parameter = (t.coefficients + (0,))[:2]
+            case _:
+                parameter = (t, 0)
+        keys = self.__sorted_knots
+        if right_closed:
+            index = max(
+                bisect.bisect_left(keys, parameter, self.__degree, last_index + 2) - 1,
+                self.__degree,
+            )
+            if index <= last_index and keys[index] <= parameter <= keys[index + 1]:
+                return index
+        else:
+            index = (
+                bisect.bisect_right(keys, parameter, self.__degree, last_index + 2) - 1
+            )
+            if self.__degree <= index <= last_index:
+                return index
         raise RuntimeError(f"argument {t} out of range")
 
+    def find_spans(
+        self, t, last_index: int | None = None, right_closed: bool = False
+    ) -> numpy.ndarray:
+        """Vectorized find_span for an array of float parameters"""
+        if last_index is None:
+            last_index = len(self) - 2
+        t = numpy.asarray(t, dtype=numpy.float64)
+        keys = self.__bisect_left_keys if right_closed else self.__bisect_right_keys
+        out_of_range = (
+            (t < self.__knot_vector[self.__degree])
+            | (t >= keys[last_index + 1])
+            | (last_index < self.__degree)
+        )
+        if numpy.any(out_of_range):
+            raise RuntimeError(f"argument {t[out_of_range][0]} out of range")
+        return numpy.maximum(
+            numpy.searchsorted(keys, t, side="right") - 1, self.__degree
+        )
+
+    def basis_matrix(self, t, derivative_degree: int = 0) -> csr_matrix:
+        """Evaluate the derivatives of all base functions of the spline degree at an
+        array of parameters. Row i of the result holds the values at t[i], and by
+        local support it has at most degree+1 nonzeros."""
+        assert derivative_degree >= 0
+        t = numpy.atleast_1d(numpy.asarray(t, dtype=numpy.float64))
+        degree = self.__degree
+        base_function_num = len(self) - degree - 1
+        # check that t is in the domain of the spline
+        self.find_spans(t, last_index=base_function_num - 1, right_closed=True)
+        # Use the nonempty span whose closure contains t, where the derivative is
+        # continuous the values agree with the limit taken with epsilon knots.
+        knots = self.__knot_array
+        end = knots[base_function_num]
+        spans = (
+            numpy.where(
+                t < end,
+                numpy.searchsorted(knots, t, side="right"),
+                numpy.searchsorted(knots, end, side="left"),
+            )
+            - 1
+        )
+        values = numpy.zeros((len(t), degree + 1))
+        if derivative_degree <= degree:
+            values = self.__nonzero_base_function_derivatives(
+                t, spans, derivative_degree
+            )
+        rows = numpy.repeat(numpy.arange(len(t)), degree + 1)
+        columns = (spans[:, None] + numpy.arange(-degree, 1)).reshape(-1)
+        return csr_matrix(
+            (values.reshape(-1), (rows, columns)),
+            shape=(len(t), base_function_num),
+        )
+
+    def __nonzero_base_function_derivatives(
+        self, t: numpy.ndarray, spans: numpy.ndarray, derivative_degree: int
+    ) -> numpy.ndarray:
+        """Evaluate the derivatives of the base functions span-degree, ..., span, which
+        are the only nonzero ones in the span."""
+        knots = self.__knot_array
+        degree = self.__degree
+        # Cox-de Boor recursion up to the degree whose derivatives are not taken
+        values = numpy.ones((len(t), 1))
+        for j in range(1, degree - derivative_degree + 1):
+            next_values = numpy.zeros((len(t), j + 1))
+            for r in range(j):
+                left_knot = knots[spans + r + 1 - j]
+                right_knot = knots[spans + r + 1]
+                tmp = values[:, r] / (right_knot - left_knot)
+                next_values[:, r] += (right_knot - t) * tmp
+                next_values[:, r + 1] = (t - left_knot) * tmp
+            values = next_values
+        # each derivative raises the degree by one
+        for j in range(degree - derivative_degree + 1, degree + 1):
+            next_values = numpy.zeros((len(t), j + 1))
+            for r in range(j):
+                left_knot = knots[spans + r + 1 - j]
+                right_knot = knots[spans + r + 1]
+                tmp = j * values[:, r] / (right_knot - left_knot)
+                next_values[:, r] -= tmp
+                next_values[:, r + 1] = tmp
+            values = next_values
+        return values
+
     def evaluate_base_function(self, t: int | float, index, degree):
         return self.evaluate_base_function_derivative(
             t, index, degree, derivative_degree=0
@@ -140,7 +330,6 @@ class KnotVector:
             )
         )
 
-    @functools.lru_cache(1000)
     def __evaluate_base_function_derivative(
         self, t: int | float, index, degree, derivative_degree
     ):
@@ -155,7 +344,7 @@ class KnotVector:
         for part_derivative_degree in range(derivative_degree + 1):
             if derivative_degree - part_derivative_degree > 1:
                 continue
-            tmp = simplify(
+            tmp = self.__simplify(
                 (
                     "*",
                     math.comb(derivative_degree, part_derivative_degree),
@@ -165,7 +354,7 @@ class KnotVector:
                 )
             )
             if derivative_degree - part_derivative_degree == 0:
-                tmp = simplify(
+                tmp = self.__simplify(
                     (
                         "*",
                         tmp,
@@ -178,7 +367,7 @@ class KnotVector:
                 )
             else:
                 assert derivative_degree - part_derivative_degree == 1
-                tmp = simplify(
+                tmp = self.__simplify(
                     (
                         "*",
                         tmp,
@@ -189,11 +378,11 @@ class KnotVector:
                         ),
                     )
                 )
-            result = tmp if result is None else simplify(("+", result, tmp))
+            result = tmp if result is None else self.__simplify(("+", result, tmp))
         for part_derivative_degree in range(derivative_degree + 1):
             if derivative_degree - part_derivative_degree > 1:
                 continue
-            tmp = simplify(
+            tmp = self.__simplify(
                 (
                     "*",
                     math.comb(derivative_degree, part_derivative_degree),
@@ -206,7 +395,7 @@ class KnotVector:
                 )
             )
             if derivative_degree - part_derivative_degree == 0:
-                tmp = simplify(
+                tmp = self.__simplify(
                     (
                         "*",
                         tmp,
@@ -223,7 +412,7 @@ class KnotVector:
                 )
             else:
                 assert derivative_degree - part_derivative_degree == 1
-                tmp = simplify(
+                tmp = self.__simplify(
                     (
                         "*",
                         tmp,
@@ -238,12 +427,18 @@ class KnotVector:
                         ),
                     )
                 )
-            result = simplify(("+", result, tmp))
+            result = self.__simplify(("+", result, tmp))
         return result
 
 
 class BSpline:
-    def __init__(self, points: list, degree: int, knot_vector: list):
+    def __init__(
+        self,
+        points: list,
+        degree: int,
+        knot_vector: list,
+        cache_size: int | None = 1000,
+    ):
         assert len(knot_vector) == len(points) + degree + 1
         point_dimension = 1
         match points[0]:
@@ -255,8 +450,22 @@ class BSpline:
             points = tuple((p,) for p in points)
         self.__points = points
         assert degree >= 1
-        self.__knot_vector = KnotVector(knot_vector, degree=degree)
+        self.__knot_vector = KnotVector(
+            knot_vector, degree=degree, cache_size=cache_size
+        )
         self.__degree = degree
+        self.__simplify = functools.partial(
+            simplify, exact=degree > FLOAT_SIMPLIFICATION_MAX_DEGREE
+        )
+        self.__cache_size = cache_size
+        # as in KnotVector, the cache refers to the instance weakly to avoid a cycle
+        instance = weakref.ref(self)
+        evaluate = BSpline.__evaluate
+        self.__evaluate = functools.lru_cache(cache_size)(
+            lambda *args, **kwargs: evaluate(instance(), *args, **kwargs)
+        )
+        self.__knots = numpy.asarray(knot_vector, dtype=numpy.float64)
+        self.__control_points = numpy.asarray(points, dtype=numpy.float64)
 
     @property
     def points(self):
@@ -266,37 +475,121 @@ class BSpline:
     def knot_vector(self):
         return self.__knot_vector.get_raw_kot_vector()
 
-    def __call__(self, t: float):
-        res = [
-            limit(self.__evaluate(t, degree=self.__degree, point_index=i))
-            for i in range(self.__point_dimension)
-        ]
+    def __call__(self, t):
+        if numpy.ndim(t) > 0:
+            return self.evaluate(t)
+        res = self.evaluate(t)[0].tolist()
         if len(res) == 1:
             return res[0]
         return res
 
+    def evaluate(self, t) -> numpy.ndarray:
+        """evaluate the spline at an array of parameters, the result has shape
+        (len(t), point_dimension)"""
+        t = numpy.atleast_1d(numpy.asarray(t, dtype=numpy.float64))
+        assert t.ndim == 1
+        knots = self.__knots
+        degree = self.__degree
+        spans = self.__knot_vector.find_spans(
+            t, last_index=len(self.__points) - 1, right_closed=True
+        )
+        result = self.__de_boor(t, spans)
+        # an empty span can only be hit at the left end of the domain, there we take the
+        # limit with epsilon knots
+        for i in numpy.flatnonzero(knots[spans] == knots[spans + 1]):
+            result[i] = [
+                limit(self.__evaluate(float(t[i]), degree=degree, point_index=j))
+                for j in range(self.__point_dimension)
+            ]
+        return result
+
+    def derivative(self, order: int = 1) -> "BSpline":
+        """The derivative curve as a spline of degree degree-order, its control points
+        are the scaled differences of the control points and its knot vector drops
+        the first and last knots"""
+        assert 0 < order < self.__degree
+        knots = self.__knots
+        control_points = self.__control_points
+        degree = self.__degree
+        for _ in range(order):
+            knot_differences = (
+                knots[degree + 1 : degree + len(control_points)]
+                - knots[1 : len(control_points)]
+            )
+            # a zero knot difference means the base function vanishes, so does its
+            # contribution
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                scales = numpy.where(knot_differences > 0, degree / knot_differences, 0)
+            control_points = scales[:, None] * numpy.diff(control_points, axis=0)
+            knots = knots[1:-1]
+            degree -= 1
+        points = control_points.tolist()
+        if self.__point_dimension == 1:
+            points = [p[0] for p in points]
+        return BSpline(
+            points=points,
+            degree=degree,
+            knot_vector=knots.tolist(),
+            cache_size=self.__cache_size,
+        )
+
+    def compile(self) -> PiecewisePolynomial:
+        """Convert the spline to local power bases on its nonempty spans, the
+        coefficients are the Taylor coefficients at the left endpoints"""
+        knots = self.__knots
+        degree = self.__degree
+        end = len(self.__points)
+        starts = [i for i in range(degree, end) if knots[i] < knots[i + 1]]
+        coefficients = numpy.stack(
+            [
+                self.__knot_vector.basis_matrix(knots[starts], derivative_degree=k)
+                @ self.__control_points
+                / math.factorial(k)
+                for k in range(degree + 1)
+            ],
+            axis=1,
+        )
+        return PiecewisePolynomial(
+            breakpoints=numpy.append(knots[starts], knots[end]),
+            coefficients=coefficients,
+        )
+
+    def __de_boor(self, t: numpy.ndarray, spans: numpy.ndarray) -> numpy.ndarray:
+        """numeric de Boor algorithm over all parameters at once"""
+        knots = self.__knots
+        degree = self.__degree
+        d = self.__control_points[spans[:, None] + numpy.arange(-degree, 1)]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            for r in range(1, degree + 1):
+                for j in range(degree, r - 1, -1):
+                    i = spans + j - degree
+                    alpha = (t - knots[i]) / (knots[i + degree + 1 - r] - knots[i])
+                    d[:, j] = (1 - alpha)[:, None] * d[:, j - 1] + alpha[:, None] * d[
+                        :, j
+                    ]
+        return d[:, degree]
+
     def get_knot(self, index):
         return self.__knot_vector.get_knot(index)
 
+    def cache_info(self):
+        """hits, misses, maxsize and currsize of the cache of this instance"""
+        return self.__evaluate.cache_info()
+
+    def cache_clear(self) -> None:
+        self.__evaluate.cache_clear()
+
     def get_knot_coefficients(self, index):
         return self.__knot_vector.get_knot_coefficients(index)
 
-    @functools.lru_cache(1000)
     def __evaluate(self, t, degree, point_index, index=None):
         """implement de Casteljau algorithm"""
         if index is None:
-            for i in range(degree, len(self.__knot_vector) - 1):
-                left_endpoint = self.get_knot_coefficients(i)
-                right_endpoint = self.get_knot_coefficients(i + 1)
-                if left_endpoint <= (t, 0) <= right_endpoint:
-                    index = i
-                    break
-        if index is None:
-            raise RuntimeError(f"argument {t} out of range")
+            index = self.__knot_vector.find_span(t, right_closed=True)
 
         if degree == 0:
             return self.__points[index][point_index]
-        return simplify(
+        return self.__simplify(
             (
                 "+",
                 (
@@ -1,83 +1,125 @@
 import numpy
-from scipy.sparse import csc_matrix
-from scipy.sparse.linalg import spsolve
+from scipy.linalg import solve_banded
+from scipy.sparse import vstack
 
 from cyy_numerical_analysis.b_spline import BSpline, KnotVector
 
 
-def chord_length_parameterization(points: list, degree: int) -> list:
-    total_norm = 0
-    for i in range(0, len(points) - 1):
-        total_norm += numpy.linalg.norm(points[i] - points[i + 1], ord=2)
-    knot_vector = [0]
-    partial_norm = 0
-    for i in range(1, len(points)):
-        partial_norm += numpy.linalg.norm(points[i] - points[i - 1], ord=2)
-        knot_vector.append(partial_norm / total_norm)
-    assert knot_vector[-1] == 1
-    knot_vector = [0] * degree + knot_vector + [1] * degree
-    return knot_vector
+def parameterize(points, method: str = "chord_length") -> numpy.ndarray:
+    """Assign parameters in [0, 1] to the points, the method is one of chord_length,
+    centripetal and uniform"""
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(len(points), -1)
+    distances = numpy.linalg.norm(numpy.diff(points, axis=0), ord=2, axis=1)
+    match method:
+        case "chord_length":
+            pass
+        case "centripetal":
+            distances = numpy.sqrt(distances)
+        case "uniform":
+            distances = numpy.ones_like(distances)
+        case _:
+            raise RuntimeError(f"unknown parameterization method {method}")
+    parameters = numpy.concatenate(([0], numpy.cumsum(distances)))
+    if parameters[-1] == 0:
+        raise RuntimeError("all points coincide")
+    # the last partial sum is the total, so the last parameter is exactly 1
+    return parameters / parameters[-1]
 
 
-def B_spline_interpolation(
-    points: list, degree: int = 3, print_matrices: bool = False
-) -> BSpline:
-    knot_vector = KnotVector(
-        chord_length_parameterization(points=points, degree=degree), degree=degree
-    )
-    n = len(points) - 1
-    A = numpy.zeros((n + 3, n + 3), dtype=numpy.float64)
-    b1 = numpy.zeros(n + 3, dtype=numpy.float64)
-    b2 = numpy.zeros(n + 3, dtype=numpy.float64)
-    row_num = 0
-    for i, point in enumerate(points):
-        if row_num in (1, n + 1):
-            row_num += 1
-        knot = knot_vector.get_knot(i + degree)
-        A[row_num][i] = knot_vector.evaluate_base_function(
-            t=knot, index=i, degree=degree
-        )
-        A[row_num][i + 1] = knot_vector.evaluate_base_function(
-            t=knot, index=i + 1, degree=degree
-        )
-        A[row_num][i + 2] = knot_vector.evaluate_base_function(
-            t=knot, index=i + 2, degree=degree
-        )
-        b1[row_num] = point[0]
-        b2[row_num] = point[1]
-        row_num += 1
+def clamped_knot_vector(parameters, degree: int) -> list:
+    return [parameters[0]] * degree + list(parameters) + [parameters[-1]] * degree
+
+
+def chord_length_parameterization(points: list, degree: int) -> list:
+    return clamped_knot_vector(parameterize(points).tolist(), degree)
 
+
+def __solve_interpolation(
+    knot_vector: KnotVector, degree: int, b: numpy.ndarray, print_matrices: bool
+) -> numpy.ndarray:
+    """Solve for the control points, each column of b holds one coordinate of the
+    points"""
+    n = b.shape[0] - 1
+    parameters = knot_vector.get_raw_kot_vector()[degree : degree + n + 1]
+    collocation = knot_vector.basis_matrix(parameters)
     # endpoint conditions
-    knot = knot_vector.get_knot(degree)
-    A[1][0] = knot_vector.evaluate_base_function_derivative(
-        t=knot, index=0, degree=degree, derivative_degree=2
-    )
-    A[1][1] = knot_vector.evaluate_base_function_derivative(
-        t=knot, index=1, degree=degree, derivative_degree=2
-    )
-    A[1][2] = knot_vector.evaluate_base_function_derivative(
-        t=knot, index=2, degree=degree, derivative_degree=2
+    end_conditions = knot_vector.basis_matrix(
+        [parameters[0], parameters[-1]], derivative_degree=2
     )
-    knot = knot_vector.get_knot(degree + n)
-    A[n + 1][n] = knot_vector.evaluate_base_function_derivative(
-        t=knot, index=n, degree=degree, derivative_degree=2
-    )
-    A[n + 1][n + 1] = knot_vector.evaluate_base_function_derivative(
-        t=knot, index=n + 1, degree=degree, derivative_degree=2
-    )
-    A[n + 1][n + 2] = knot_vector.evaluate_base_function_derivative(
-        t=knot, index=n + 2, degree=degree, derivative_degree=2
+    A = vstack(
+        [
+            collocation[:1],
+            end_conditions[:1],
+            collocation[1:n],
+            end_conditions[1:],
+            collocation[n:],
+        ],
+        format="coo",
     )
+    A.eliminate_zeros()
+    # store A in the banded form of solve_banded, it is tridiagonal for cubic splines
+    lower = int(max(A.row - A.col))
+    upper = int(max(A.col - A.row))
+    banded_A = numpy.zeros((lower + upper + 1, n + 3), dtype=numpy.float64)
+    banded_A[upper + A.row - A.col, A.col] = A.data
+    extended_b = numpy.zeros((n + 3, b.shape[1]), dtype=numpy.float64)
+    extended_b[[0, *range(2, n + 1), n + 2]] = b
     if print_matrices:
         print(A)
-        print(b1)
-        print(b2)
-    sparse_A = csc_matrix(A, dtype=float)
-    X = spsolve(sparse_A, b1).tolist()
-    Y = spsolve(sparse_A, b2).tolist()
+        print(extended_b)
+    # all right-hand sides share one factorization
+    return solve_banded((lower, upper), banded_A, extended_b)
+
+
+def B_spline_interpolation(
+    points: list,
+    degree: int = 3,
+    print_matrices: bool = False,
+    parameterization: str = "chord_length",
+) -> BSpline:
+    # the end conditions only make the system square for cubic splines
+    assert degree == 3
+    knot_vector = KnotVector(
+        clamped_knot_vector(
+            parameterize(points, method=parameterization).tolist(), degree
+        ),
+        degree=degree,
+    )
+    # one right-hand side for each coordinate
+    b = numpy.asarray(points, dtype=numpy.float64).reshape(len(points), -1)
+    control_points = __solve_interpolation(
+        knot_vector, degree, b, print_matrices
+    ).tolist()
+    if numpy.ndim(points[0]) == 0:
+        control_points = [p[0] for p in control_points]
 
     return BSpline(
-        points=list(zip(X, Y, strict=False)),
-        degree=3,
+        points=control_points,
+        degree=degree,
         knot_vector=knot_vector.get_raw_kot_vector(),
     )
+
+
+def batch_B_spline_interpolation(points, parameters, degree: int = 3) -> list[BSpline]:
+    """Interpolate curves sharing the parameters at once, points has shape (curve
+    number, point number) or (curve number, point number, dimension). Only cubic
+    splines are supported, like B_spline_interpolation."""
+    assert degree == 3
+    points = numpy.asarray(points, dtype=numpy.float64)
+    knot_vector = KnotVector(
+        clamped_knot_vector(numpy.asarray(parameters).tolist(), degree),
+        degree=degree,
+    )
+    # one right-hand side for each coordinate of each curve
+    b = numpy.moveaxis(points, 0, 1).reshape(points.shape[1], -1)
+    control_points = __solve_interpolation(
+        knot_vector, degree, b, print_matrices=False
+    ).reshape((-1, points.shape[0]) + points.shape[2:])
+    return [
+        BSpline(
+            points=curve_control_points.tolist(),
+            degree=degree,
+            knot_vector=knot_vector.get_raw_kot_vector(),
+        )
+        for curve_control_points in numpy.moveaxis(control_points, 1, 0)
+    ]
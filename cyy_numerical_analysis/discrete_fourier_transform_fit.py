@@ -1,21 +1,81 @@
-import math
 from collections.abc import Callable
 
 import numpy as np
 
+# The number of angles held in memory at once by the interpolants of DFF_interpolation.
+DFF_CHUNK_SIZE = 2**20
 
-def DFF_interpolation(f: Callable, n: int, c: float, d: float) -> Callable:
-    dff_y = np.fft.fft(f(np.array([i / n for i in range(n)])), norm=None)
-    a = np.real(dff_y)
-    b = np.imag(dff_y)
-
-    def P(t: float) -> float:
-        u = (t - c) / (d - c)
-        r = a[0] + a[n // 2] * np.cos(n * np.pi * u)
-        for k in range(1, n // 2):
-            r += 2 * (
-                a[k] * np.cos(2 * k * np.pi * u) - b[k] * np.sin(2 * k * math.pi * u)
+
+def __DFF_spectrum(f: Callable, n: int) -> np.ndarray:
+    """The input is real, so rfft keeps only the n // 2 + 1 nonnegative frequencies"""
+    return np.fft.rfft(f(np.arange(n) / n), norm=None)
+
+
+def __trigonometric_evaluator(
+    dff_y: np.ndarray, n: int, c: float, d: float
+) -> Callable:
+    """dff_y holds the rfft of one signal or of many signals along its last axis"""
+    # the coefficients are moved to the first axis so that they are contracted by matrix
+    # products
+    a = np.moveaxis(np.real(dff_y), -1, 0)
+    b = np.moveaxis(np.imag(dff_y), -1, 0)
+    k = np.arange(1, n // 2)
+
+    def P(t):
+        """t can be a number or an array, for many signals the first axis of the result
+        is the signal"""
+        u = (np.asarray(t, dtype=np.float64) - c) / (d - c)
+        flat_u = u.reshape(-1)
+        r = np.empty((len(flat_u),) + a.shape[1:])
+        chunk_size = max(DFF_CHUNK_SIZE // max(len(k), 1), 1)
+        for start in range(0, len(flat_u), chunk_size):
+            chunk = flat_u[start : start + chunk_size]
+            angles = 2 * np.pi * np.multiply.outer(chunk, k)
+            r[start : start + chunk_size] = 2 * (
+                np.cos(angles) @ a[1 : n // 2] - np.sin(angles) @ b[1 : n // 2]
             )
-        return r / n
+        nyquist = np.cos(n * np.pi * flat_u).reshape((-1,) + (1,) * (a.ndim - 1))
+        r += a[0] + a[n // 2] * nyquist
+        r = (r / n).reshape(u.shape + a.shape[1:])
+        if a.ndim == 1:
+            return r[()]
+        return np.moveaxis(r, -1, 0)
 
     return P
+
+
+def DFF_interpolation(f: Callable, n: int, c: float, d: float) -> Callable:
+    return __trigonometric_evaluator(__DFF_spectrum(f, n), n, c, d)
+
+
+def batch_DFF_interpolation(samples, c: float, d: float) -> Callable:
+    """Fit many signals at once, samples has shape (signal number, n) and holds the
+    values at c + (d - c) * j / n. The returned function evaluates all the signals."""
+    samples = np.asarray(samples, dtype=np.float64)
+    assert samples.ndim == 2
+    return __trigonometric_evaluator(
+        np.fft.rfft(samples, axis=1, norm=None), samples.shape[1], c, d
+    )
+
+
+def DFF_resampling(f: Callable, n: int, m: int) -> np.ndarray:
+    """Evaluate the interpolant of f at the m points u = j / m of the unit interval by
+    an inverse FFT of size m, which equals the interpolant of DFF_interpolation at c
+    + (d - c) * u, n should be even"""
+    assert n % 2 == 0
+    dff_y = __DFF_spectrum(f, n)
+    # The interpolant is the sum of coefficients[k] * exp(2 * pi * i * frequencies[k] *
+    # u), the frequencies are folded into the m frequencies of the grid.
+    frequencies = np.concatenate(
+        ([0, n // 2, -(n // 2)], np.arange(1, n // 2), -np.arange(1, n // 2))
+    )
+    coefficients = np.concatenate(
+        (
+            [dff_y[0], dff_y[n // 2].real / 2, dff_y[n // 2].real / 2],
+            dff_y[1 : n // 2],
+            np.conj(dff_y[1 : n // 2]),
+        )
+    )
+    spectrum = np.zeros(m, dtype=np.complex128)
+    np.add.at(spectrum, frequencies % m, coefficients / n)
+    return np.real(np.fft.ifft(spectrum, norm="forward"))
@@ -1,6 +1,8 @@
 import functools
 from collections.abc import Callable
 
+import numpy
+
 
 def trapezoid_rule(f: Callable, a: float, b: float) -> float:
     h = b - a
@@ -12,16 +14,30 @@ def simpson_rule(f: Callable, a: float, b: float) -> float:
     return h * (f(a) + 4 * f(a + h) + f(b)) / 3
 
 
-def composite_trapezoid_rule(f: Callable, a: float, b: float, m: int) -> float:
+def composite_trapezoid_rule(
+    f: Callable, a: float, b: float, m: int, vectorized: bool = False
+) -> float:
+    """If vectorized is true, f is called once with the array of all the nodes"""
     h = (b - a) / m
+    if vectorized:
+        y = f(a + h * numpy.arange(m + 1))
+        return float((y[0] + y[-1] + 2 * numpy.sum(y[1:-1])) * h / 2)
     res = f(a) + f(b)
     for i in range(1, m):
         res += 2 * f(a + h * i)
     return res * h / 2
 
 
-def composite_simpson_rule(f: Callable, a: float, b: float, m: int) -> float:
+def composite_simpson_rule(
+    f: Callable, a: float, b: float, m: int, vectorized: bool = False
+) -> float:
+    """If vectorized is true, f is called once with the array of all the nodes"""
     h = (b - a) / (2 * m)
+    if vectorized:
+        y = f(a + h * numpy.arange(2 * m + 1))
+        return float(
+            (y[0] + y[-1] + 4 * numpy.sum(y[1:-1:2]) + 2 * numpy.sum(y[2:-1:2])) * h / 3
+        )
     res = f(a) + f(b)
     for i in range(1, m + 1):
         res += 4 * f(a + h * (2 * i - 1))
@@ -41,9 +57,24 @@ def three_point_rule(f: Callable, a: float, b: float) -> float:
 
 
 def composite_integration(
-    f: Callable, a: float, b: float, m: int, integration_method: Callable
+    f: Callable,
+    a: float,
+    b: float,
+    m: int,
+    integration_method: Callable,
+    vectorized: bool = False,
 ) -> float:
+    """If vectorized is true, integration_method is applied once to the arrays of the
+    endpoints of all the subintervals, so f is called with arrays"""
     h = (b - a) / m
+    if vectorized:
+        return float(
+            numpy.sum(
+                integration_method(
+                    f, a + h * numpy.arange(m), a + h * numpy.arange(1, m + 1)
+                )
+            )
+        )
     res: float = 0
     for i in range(m):
         res += integration_method(f, a + h * i, a + h * (i + 1))
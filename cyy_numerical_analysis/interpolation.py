@@ -1,51 +1,214 @@
-import math
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
+from typing import Self
 
+import numpy
 from polynomial import PolynomialWithBasePoint
-from typing import Sequence
+from scipy.fft import dct
 
+# The number of distances between points and base points held in memory at once by
+# BarycentricInterpolant.
+BARYCENTRIC_CHUNK_SIZE = 2**20
 
-def lagrange_interpolating(points: Sequence[tuple[float, float]]) -> Callable:
-    def f(x):
-        y = 0
-        for i, (x_1, y_1) in enumerate(points):
-            numerator = 1
-            denominator = 1
-            for j, (x_2, _) in enumerate(points):
-                if i != j:
-                    numerator *= x - x_2
-                    denominator *= x_1 - x_2
-            y += y_1 * numerator / denominator
-        return y
 
-    return f
+class BarycentricInterpolant:
+    def __init__(self, base_points, values, weights=None) -> None:
+        """The barycentric form of the Lagrange interpolating polynomial through
+        (base_points[i], values[i]), values[i] may be a vector. The weights are
+        computed in O(n^2) unless they are given."""
+        self.__base_points = numpy.asarray(base_points, dtype=numpy.float64)
+        assert len(numpy.unique(self.__base_points)) == len(self.__base_points)
+        if weights is None:
+            # The weights are only determined up to a common factor, scaling the
+            # distances by the capacity of the interval avoids overflow and underflow of
+            # the products.
+            distances = numpy.subtract.outer(self.__base_points, self.__base_points)
+            length = numpy.ptp(self.__base_points)
+            if length > 0:
+                distances *= 4 / length
+            numpy.fill_diagonal(distances, 1)
+            weights = 1 / numpy.prod(distances, axis=1)
+        self.__weights = numpy.asarray(weights, dtype=numpy.float64)
+        assert self.__weights.shape == self.__base_points.shape
+        self.__values = None
+        self.set_values(values)
+
+    @classmethod
+    def from_chebyshev_points(cls, f: Callable, a: float, b: float, n: int) -> Self:
+        """Interpolate f at the n Chebyshev points of the first kind in [a,b], f is
+        called once with all the points. The weights are known in closed form."""
+        angles = (2 * numpy.arange(n) + 1) * numpy.pi / (2 * n)
+        base_points = chebyshev_points(a, b, n)
+        weights = numpy.where(numpy.arange(n) % 2 == 0, 1.0, -1.0) * numpy.sin(angles)
+        return cls(base_points, f(base_points), weights)
+
+    @property
+    def base_points(self) -> numpy.ndarray:
+        return self.__base_points
+
+    @property
+    def weights(self) -> numpy.ndarray:
+        return self.__weights
+
+    @property
+    def values(self) -> numpy.ndarray:
+        return self.__values
+
+    def set_values(self, values) -> None:
+        """Interpolate new values at the same base points, the weights are reused"""
+        values = numpy.asarray(values, dtype=numpy.float64)
+        assert len(values) == len(self.__base_points)
+        self.__values = values
+
+    def __call__(self, x):
+        """x can be a number or an array"""
+        x = numpy.asarray(x, dtype=numpy.float64)
+        flat_x = x.reshape(-1)
+        y = numpy.empty((len(flat_x),) + self.__values.shape[1:])
+        chunk_size = max(BARYCENTRIC_CHUNK_SIZE // len(self.__base_points), 1)
+        for start in range(0, len(flat_x), chunk_size):
+            chunk = flat_x[start : start + chunk_size]
+            distances = numpy.subtract.outer(chunk, self.__base_points)
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                terms = self.__weights / distances
+                chunk_y = (terms @ self.__values) / terms.sum(axis=1).reshape(
+                    (-1,) + (1,) * (self.__values.ndim - 1)
+                )
+            # the formula is undefined at the base points
+            rows, columns = numpy.nonzero(distances == 0)
+            chunk_y[rows] = self.__values[columns]
+            y[start : start + chunk_size] = chunk_y
+        return y.reshape(x.shape + self.__values.shape[1:])[()]
+
+
+def lagrange_interpolating(points: Sequence[tuple[float, float]]) -> Callable:
+    return BarycentricInterpolant([p[0] for p in points], [p[1] for p in points])
 
 
 def chebyshev_base_points(a: float, b: float, n: int, f: Callable) -> list:
-    """Get n base points from interval [a,b] for interpolation of f"""
-    base_points = []
-    for i in range(1, n + 1, 2):
-        x = (b - a) * math.cos(i * math.pi / (2 * n)) / 2 + (b + a) / 2
-        base_points.append((x, f(x)))
-    return base_points
+    """Get n base points from interval [a,b] for interpolation of f, f is called with
+    floats. BarycentricInterpolant.from_chebyshev_points samples an array-capable f
+    at once."""
+    return [(x, f(x)) for x in chebyshev_points(a, b, n).tolist()]
+
+
+def chebyshev_points(a: float, b: float, n: int) -> numpy.ndarray:
+    """The n Chebyshev points of the first kind in [a,b], in decreasing order"""
+    return (b - a) * numpy.cos((2 * numpy.arange(n) + 1) * numpy.pi / (2 * n)) / 2 + (
+        b + a
+    ) / 2
+
+
+class ChebyshevApproximation:
+    def __init__(self, coefficients, a: float, b: float) -> None:
+        """The sum of coefficients[k] * T_k(t) on [a,b], where t is x mapped to [-1,1]
+        and T_k is the Chebyshev polynomial of degree k"""
+        assert a < b
+        self.__coefficients = numpy.asarray(coefficients, dtype=numpy.float64)
+        assert len(self.__coefficients) > 0
+        self.__a = a
+        self.__b = b
+
+    @classmethod
+    def fit(
+        cls,
+        f: Callable,
+        a: float,
+        b: float,
+        n: int | None = None,
+        tolerance: float = 1e-14,
+        max_point_number: int = 2**16,
+    ) -> Self:
+        """Interpolate f at n Chebyshev points, f is called once with all the points. If
+        n is None, the number of points is doubled until the trailing coefficients
+        fall below tolerance relative to the largest one, then the negligible
+        coefficients are dropped."""
+        if n is not None:
+            return cls(cls.__interpolation_coefficients(f, a, b, n), a, b)
+        n = 16
+        while n <= max_point_number:
+            coefficients = cls.__interpolation_coefficients(f, a, b, n)
+            negligible = numpy.abs(coefficients) <= tolerance * numpy.max(
+                numpy.abs(coefficients)
+            )
+            if numpy.all(negligible[-3:]):
+                degree = numpy.flatnonzero(~negligible)
+                return cls(coefficients[: degree[-1] + 1 if len(degree) else 1], a, b)
+            n *= 2
+        raise RuntimeError(
+            f"the coefficients do not decay with {max_point_number} points"
+        )
+
+    @staticmethod
+    def __interpolation_coefficients(f: Callable, a: float, b: float, n: int):
+        values = numpy.broadcast_to(
+            numpy.asarray(f(chebyshev_points(a, b, n)), dtype=numpy.float64), (n,)
+        )
+        # the values at the Chebyshev points of the first kind are transformed to the
+        # coefficients by a DCT of type II
+        coefficients = dct(values, type=2) / n
+        coefficients[0] /= 2
+        return coefficients
+
+    @property
+    def coefficients(self) -> numpy.ndarray:
+        return self.__coefficients
+
+    @property
+    def domain(self) -> tuple[float, float]:
+        return (self.__a, self.__b)
+
+    def degree(self) -> int:
+        return len(self.__coefficients) - 1
+
+    def __call__(self, x):
+        """x can be a number or an array"""
+        t = (2 * numpy.asarray(x, dtype=numpy.float64) - self.__a - self.__b) / (
+            self.__b - self.__a
+        )
+        # Clenshaw's recurrence
+        b_1 = numpy.zeros_like(t)
+        b_2 = numpy.zeros_like(t)
+        for c in self.__coefficients[:0:-1]:
+            b_1, b_2 = c + 2 * t * b_1 - b_2, b_1
+        return (self.__coefficients[0] + t * b_1 - b_2)[()]
 
 
 def newton_divided_difference(
     points: Sequence[tuple[float, float]],
 ) -> PolynomialWithBasePoint:
-    n = len(points)
-    divided_differences: dict[tuple, float] = {}
-    for p in points:
-        divided_differences[(p[0],)] = p[1]
-    x: tuple = tuple(p[0] for p in points)
-    coefficients = [divided_differences[(points[0][0],)]]
-    for i in range(2, n + 1):
-        for j in range(n - i + 1):
-            divided_differences[x[j : j + i]] = (
-                divided_differences[x[j + 1 : j + i]]
-                - divided_differences[x[j : j + i - 1]]
-            ) / (x[j + i - 1] - x[j])
-            if j == 0:
-                coefficients.append(divided_differences[x[j : j + i]])
-
-    return PolynomialWithBasePoint(coefficients, x[:-1])
+    x = numpy.array([p[0] for p in points], dtype=numpy.float64)
+    # After step i, differences[j] holds the divided difference of x[j-i:j+1] for j >=
+    # i, the table is computed in place column by column.
+    differences = numpy.array([p[1] for p in points], dtype=numpy.float64)
+    for i in range(1, len(points)):
+        differences[i:] = (differences[i:] - differences[i - 1 : -1]) / (x[i:] - x[:-i])
+    return PolynomialWithBasePoint(differences.tolist(), x[:-1].tolist())
+
+
+class NewtonInterpolant:
+    def __init__(self, points: Sequence[tuple[float, float]] = ()) -> None:
+        """Newton form of the interpolating polynomial, the points can be added one at a
+        time"""
+        self.__base_points: list = []
+        self.__coefficients: list = []
+        # the divided differences of the points from each base point to the last one
+        self.__last_differences: list = []
+        for x, y in points:
+            self.add_point(x, y)
+
+    def add_point(self, x: float, y: float) -> PolynomialWithBasePoint:
+        """Add a point in O(n) and return the extended interpolating polynomial"""
+        differences = [y]
+        for base_point, difference in zip(
+            reversed(self.__base_points), reversed(self.__last_differences), strict=True
+        ):
+            differences.append((differences[-1] - difference) / (x - base_point))
+        differences.reverse()
+        self.__base_points.append(x)
+        self.__coefficients.append(differences[0])
+        self.__last_differences = differences
+        return self.polynomial()
+
+    def polynomial(self) -> PolynomialWithBasePoint:
+        assert self.__coefficients
+        return PolynomialWithBasePoint(self.__coefficients, self.__base_points[:-1])
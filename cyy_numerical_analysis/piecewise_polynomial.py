@@ -0,0 +1,78 @@
+from typing import Self
+
+import numpy
+
+
+class PiecewisePolynomial:
+    def __init__(self, breakpoints, coefficients) -> None:
+        """On [breakpoints[i], breakpoints[i+1]] the polynomial is the sum of
+        coefficients[i][k] * (x - breakpoints[i]) ** k, coefficients[i][k] may be a
+        vector for curves"""
+        self.__breakpoints = numpy.ascontiguousarray(breakpoints, dtype=numpy.float64)
+        self.__coefficients = numpy.ascontiguousarray(coefficients, dtype=numpy.float64)
+        assert len(self.__breakpoints) >= 2
+        assert self.__coefficients.shape[0] == len(self.__breakpoints) - 1
+        assert numpy.all(numpy.diff(self.__breakpoints) > 0)
+
+    @property
+    def breakpoints(self) -> numpy.ndarray:
+        return self.__breakpoints
+
+    @property
+    def coefficients(self) -> numpy.ndarray:
+        return self.__coefficients
+
+    def degree(self) -> int:
+        return self.__coefficients.shape[1] - 1
+
+    def find_segments(self, x) -> numpy.ndarray:
+        """Find the indices of the segments [breakpoints[i], breakpoints[i+1])
+        containing x, the last segment is closed."""
+        x = numpy.asarray(x, dtype=numpy.float64)
+        out_of_range = (x < self.__breakpoints[0]) | (x > self.__breakpoints[-1])
+        if numpy.any(out_of_range):
+            raise RuntimeError(f"argument {x[out_of_range].flat[0]} out of range")
+        return numpy.minimum(
+            numpy.searchsorted(self.__breakpoints, x, side="right") - 1,
+            len(self.__coefficients) - 1,
+        )
+
+    def __call__(self, x, derivative_order: int = 0):
+        """Evaluate the polynomials or their derivatives of derivative_order at x, x can
+        be a number or an array"""
+        x = numpy.asarray(x, dtype=numpy.float64)
+        value_shape = self.__coefficients.shape[2:]
+        flat_x = x.reshape(-1)
+        segments = self.find_segments(flat_x)
+        if derivative_order > self.degree():
+            return numpy.zeros(x.shape + value_shape)[()]
+        coefficients = self.__coefficients[segments, derivative_order:]
+        if derivative_order > 0:
+            # the falling factorials k * (k - 1) * ... * (k - derivative_order + 1)
+            factors = numpy.ones(coefficients.shape[1])
+            for i in range(derivative_order):
+                factors *= numpy.arange(derivative_order - i, self.degree() + 1 - i)
+            coefficients = coefficients * factors.reshape(
+                (1, -1) + (1,) * len(value_shape)
+            )
+        # broadcast x over the dimensions of vector coefficients
+        dx = (flat_x - self.__breakpoints[segments]).reshape(
+            (-1,) + (1,) * len(value_shape)
+        )
+        # Nested multiplication
+        y = coefficients[:, -1]
+        for k in reversed(range(coefficients.shape[1] - 1)):
+            y = y * dx + coefficients[:, k]
+        return y.reshape(x.shape + value_shape)[()]
+
+    def derivative(self, order: int = 1) -> Self:
+        coefficients = self.__coefficients
+        for _ in range(order):
+            if coefficients.shape[1] == 1:
+                coefficients = numpy.zeros_like(coefficients)
+                break
+            factors = numpy.arange(1, coefficients.shape[1]).reshape(
+                (1, -1) + (1,) * (coefficients.ndim - 2)
+            )
+            coefficients = coefficients[:, 1:] * factors
+        return PiecewisePolynomial(self.__breakpoints, coefficients)
@@ -1,64 +1,250 @@
-from collections.abc import Sequence
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
 from functools import lru_cache
 from typing import Self
 
+import numpy
+from scipy.fft import irfft, next_fast_len, rfft
+
+# Floating point products with both factors at least this long are computed by FFT.
+FFT_MULTIPLICATION_THRESHOLD = 512
+# Polynomials with at most this many coefficients are added and multiplied as
+# tuples, arrays only pay off for longer ones.
+SHORT_POLYNOMIAL_LENGTH = 16
+# At most this many polynomials are shared by Polynomial.interned.
+INTERNED_POLYNOMIAL_LIMIT = 4096
+
+
+def batch_multiply(a, b) -> numpy.ndarray:
+    """Multiply polynomials given as coefficient arrays along the last axis, from the
+    lowest power to the highest power. The other axes are broadcast, so many pairs
+    are multiplied at once."""
+    a = numpy.asarray(a, dtype=numpy.float64)
+    b = numpy.asarray(b, dtype=numpy.float64)
+    if a.shape[-1] < b.shape[-1]:
+        a, b = b, a
+    n = a.shape[-1] + b.shape[-1] - 1
+    if b.shape[-1] >= FFT_MULTIPLICATION_THRESHOLD:
+        size = next_fast_len(n, real=True)
+        return irfft(rfft(a, size) * rfft(b, size), size)[..., :n]
+    result = numpy.zeros(numpy.broadcast_shapes(a.shape[:-1], b.shape[:-1]) + (n,))
+    for j in range(b.shape[-1]):
+        result[..., j : j + a.shape[-1]] += a * b[..., j : j + 1]
+    return result
+
+
+def __evaluate_batch(coefficients: numpy.ndarray, x: numpy.ndarray) -> numpy.ndarray:
+    """Evaluate the polynomials in the last axis of coefficients at the points in the
+    last axis of x by nested multiplication"""
+    y = coefficients[..., -1:] + 0 * x
+    for k in reversed(range(coefficients.shape[-1] - 1)):
+        y = y * x + coefficients[..., k : k + 1]
+    return y
+
+
+def batch_roots(coefficients, polish_steps: int = 0) -> numpy.ndarray:
+    """Find all the complex roots of polynomials given as coefficient arrays along the
+    last axis, from the lowest power to the highest power. The roots are the
+    eigenvalues of the companion matrices, which are computed in one batched call,
+    polish_steps Newton iterations may follow to refine them."""
+    coefficients = numpy.asarray(coefficients, dtype=numpy.float64)
+    degree = coefficients.shape[-1] - 1
+    assert numpy.all(coefficients[..., -1] != 0)
+    if degree == 0:
+        return numpy.zeros(coefficients.shape[:-1] + (0,), dtype=numpy.complex128)
+    companion = numpy.zeros(coefficients.shape[:-1] + (degree, degree))
+    companion[..., numpy.arange(1, degree), numpy.arange(degree - 1)] = 1
+    companion[..., -1] = -coefficients[..., :-1] / coefficients[..., -1:]
+    roots = numpy.linalg.eigvals(companion).astype(numpy.complex128)
+    value = __evaluate_batch(coefficients, roots)
+    for _ in range(polish_steps):
+        derivative = __evaluate_batch(
+            coefficients[..., 1:] * numpy.arange(1, degree + 1), roots
+        )
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            candidates = roots - value / derivative
+        candidate_value = __evaluate_batch(coefficients, candidates)
+        # Newton steps are unreliable at multiple roots, only keep the steps that reduce
+        # the residuals
+        improved = numpy.abs(candidate_value) < numpy.abs(value)
+        roots = numpy.where(improved, candidates, roots)
+        value = numpy.where(improved, candidate_value, value)
+    return roots
+
 
 class Polynomial:
+    __slots__ = ("__coefficients", "__array")
+    __interned: OrderedDict = OrderedDict()
+    __interned_lock = threading.Lock()
+
     def __init__(self, coefficients: Sequence[float]):
         """the coefficients are from the lowest power to the highest power"""
-        assert coefficients
-        while coefficients and coefficients[-1] == 0:
-            coefficients = coefficients[:-1]
-        if not coefficients:
-            coefficients = [0]
-        self.__coefficients: tuple = tuple(coefficients)
+        assert len(coefficients) > 0
+        if isinstance(coefficients, numpy.ndarray):
+            coefficients = coefficients.tolist()
+        # trim the trailing zeros in a single pass
+        end = len(coefficients)
+        while end > 1 and coefficients[end - 1] == 0:
+            end -= 1
+        self.__coefficients = tuple(coefficients[:end])
+        self.__array = None
+
+    @classmethod
+    def interned(cls, coefficients: Sequence) -> Self:
+        """A shared instance for constants and linear polynomials like knots, which are
+        created over and over in hot loops. Sharing is safe since polynomials are
+        immutable. The table keeps the INTERNED_POLYNOMIAL_LIMIT most recent ones."""
+        if len(coefficients) > 2:
+            return cls(coefficients)
+        # the types are in the key so a fraction is never replaced by an equal float
+        key = tuple((type(c), c) for c in coefficients)
+        # the table is shared by all threads, the lookup and the eviction are atomic
+        with cls.__interned_lock:
+            polynomial = cls.__interned.get(key)
+            if polynomial is not None:
+                cls.__interned.move_to_end(key)
+                return polynomial
+            polynomial = cls(coefficients)
+            cls.__interned[key] = polynomial
+            if len(cls.__interned) > INTERNED_POLYNOMIAL_LIMIT:
+                cls.__interned.popitem(last=False)
+            return polynomial
+
+    @classmethod
+    def clear_interned(cls) -> None:
+        with cls.__interned_lock:
+            cls.__interned.clear()
 
     @property
     def coefficients(self) -> tuple:
         return self.__coefficients
 
+    @property
+    def coefficient_array(self) -> numpy.ndarray:
+        """The coefficients in a read-only float array, or an object array for
+        exact numbers like fractions. It is built on first use."""
+        if self.__array is None:
+            array = numpy.array(self.__coefficients)
+            if array.dtype != object:
+                array = array.astype(numpy.float64)
+            array.flags.writeable = False
+            self.__array = array
+        return self.__array
+
     def is_constant(self) -> bool:
         return len(self.__coefficients) == 1
 
     def degree(self) -> int:
         return len(self.__coefficients) - 1
 
+    def __is_short(self, other) -> bool:
+        return (
+            len(self.__coefficients) <= SHORT_POLYNOMIAL_LENGTH
+            and len(other.coefficients) <= SHORT_POLYNOMIAL_LENGTH
+        )
+
     def __add__(self, other):
-        coef_size = max(len(self.coefficients), len(other.coefficients))
-        result_coefficient = list(self.coefficients) + [0] * (
-            coef_size - len(self.coefficients)
+        if self.__is_short(other):
+            a, b = self.__coefficients, other.coefficients
+            if len(a) < len(b):
+                a, b = b, a
+            result_coefficient = list(a)
+            for i, c in enumerate(b):
+                result_coefficient[i] += c
+            return Polynomial(result_coefficient)
+        a = self.coefficient_array
+        b = other.coefficient_array
+        result_coefficient = numpy.zeros(
+            max(len(a), len(b)), dtype=numpy.result_type(a, b)
         )
-        for i, cof in enumerate(other.coefficients):
-            result_coefficient[i] += cof
+        result_coefficient[: len(a)] += a
+        result_coefficient[: len(b)] += b
         return Polynomial(result_coefficient)
 
     def __sub__(self, other):
-        coef_size = max(len(self.coefficients), len(other.coefficients))
-        result_coefficient = list(self.coefficients) + [0] * (
-            coef_size - len(self.coefficients)
+        if self.__is_short(other):
+            result_coefficient = list(self.__coefficients) + [0] * (
+                len(other.coefficients) - len(self.__coefficients)
+            )
+            for i, c in enumerate(other.coefficients):
+                result_coefficient[i] -= c
+            return Polynomial(result_coefficient)
+        a = self.coefficient_array
+        b = other.coefficient_array
+        result_coefficient = numpy.zeros(
+            max(len(a), len(b)), dtype=numpy.result_type(a, b)
         )
-        for i, cof in enumerate(other.coefficients):
-            result_coefficient[i] -= cof
+        result_coefficient[: len(a)] += a
+        result_coefficient[: len(b)] -= b
         return Polynomial(result_coefficient)
 
     def __mul__(self, other):
-        other_coefficients = None
         match other:
             case Polynomial():
-                other_coefficients = other.coefficients
+                if self.__is_short(other):
+                    result_coefficient = [0] * (
+                        len(self.__coefficients) + len(other.coefficients) - 1
+                    )
+                    for i, c in enumerate(self.__coefficients):
+                        for j, d in enumerate(other.coefficients):
+                            result_coefficient[i + j] += c * d
+                    return Polynomial(result_coefficient)
+                a = self.coefficient_array
+                b = other.coefficient_array
+                if (
+                    a.dtype != object
+                    and b.dtype != object
+                    and min(len(a), len(b)) >= FFT_MULTIPLICATION_THRESHOLD
+                ):
+                    return Polynomial(batch_multiply(a, b))
+                return Polynomial(numpy.convolve(a, b))
             case _:
-                other_coefficients = [other]
+                return Polynomial([c * other for c in self.__coefficients])
 
-        coef_size = len(self.coefficients) + len(other.coefficients)
-        result_coefficient = [0] * coef_size
-        for i, coef in enumerate(self.coefficients):
-            for j, coef2 in enumerate(other_coefficients):
-                result_coefficient[i + j] += coef * coef2
+    def __truediv__(self, other):
+        return Polynomial([c / other for c in self.__coefficients])
 
-        return Polynomial(result_coefficient)
+    def __divmod__(self, other) -> tuple[Self, Self]:
+        """polynomial long division"""
+        assert not other.is_zero()
+        divisor = other.coefficients
+        remainder = list(self.coefficients)
+        quotient = [0] * max(len(remainder) - len(divisor) + 1, 1)
+        for i in reversed(range(len(remainder) - len(divisor) + 1)):
+            c = remainder[i + len(divisor) - 1] / divisor[-1]
+            quotient[i] = c
+            for j, d in enumerate(divisor):
+                remainder[i + j] -= c * d
+        return Polynomial(quotient), Polynomial(remainder[: len(divisor) - 1] or [0])
 
-    def __truediv__(self, other):
-        return Polynomial([c / other for c in self.coefficients])
+    def __floordiv__(self, other) -> Self:
+        return divmod(self, other)[0]
+
+    def __mod__(self, other) -> Self:
+        return divmod(self, other)[1]
+
+    def is_zero(self) -> bool:
+        return len(self.__coefficients) == 1 and self.__coefficients[0] == 0
+
+    def gcd(self, other, tolerance: float = 0) -> Self:
+        """Monic greatest common divisor by the Euclidean algorithm. It is exact for
+        fraction coefficients, for floating point coefficients remainder coefficients
+        not greater than tolerance times the largest coefficient of the dividend are
+        treated as zeros."""
+        a, b = self, other
+        if a.is_zero() and b.is_zero():
+            return Polynomial([0])
+        while not b.is_zero():
+            scale = max(abs(c) for c in a.coefficients)
+            remainder = Polynomial(
+                [0 if abs(c) <= tolerance * scale else c for c in (a % b).coefficients]
+            )
+            if not remainder.is_zero():
+                # keep the remainders monic to limit the growth of the coefficients
+                remainder = remainder / remainder.coefficients[-1]
+            a, b = b, remainder
+        return a / a.coefficients[-1]
 
     def __str__(self):
         return f"coefficients:{self.coefficients}"
@@ -73,32 +259,39 @@ class Polynomial:
         return self.coefficients == other.coefficients
 
     def derivative(self) -> Self:
-        return Polynomial(
-            coefficients=[idx * coef for idx, coef in enumerate(self.__coefficients)][
-                1:
-            ]
-        )
+        if self.is_constant():
+            return Polynomial.interned([0.0])
+        return Polynomial([i * c for i, c in enumerate(self.__coefficients)][1:])
 
-    @lru_cache
-    def __call__(self, x: float) -> float:
-        # Nested multiplication
-        coefficients: tuple = tuple(reversed(self.__coefficients))
-        y = coefficients[0]
-        for c in coefficients[1:]:
+    def __call__(self, x):
+        """x can be a number or an array"""
+        coefficients = self.__coefficients
+        # Nested multiplication, 0 * x broadcasts constant polynomials to the shape of x
+        y = coefficients[-1] + 0 * x
+        for c in coefficients[-2::-1]:
             y = y * x + c
         return y
 
+    def roots(self, polish_steps: int = 0) -> numpy.ndarray:
+        """All the complex roots, see batch_roots"""
+        return batch_roots(self.coefficient_array.astype(numpy.float64), polish_steps)
+
+    def cached(self, maxsize: int | None = 128) -> Callable:
+        """Evaluation memoized with a bounded cache, for repeated scalar arguments"""
+        return lru_cache(maxsize)(self.__call__)
+
 
 class PolynomialWithBasePoint:
+    __slots__ = ("__coefficients", "__base_points")
+
     def __init__(
         self, coefficients: Sequence[float], base_points: Sequence[float]
     ) -> None:
         assert coefficients
-        while coefficients and coefficients[-1] == 0:
-            coefficients = coefficients[:-1]
-        if not coefficients:
-            coefficients = [0]
-        self.__coefficients: tuple = tuple(coefficients)
+        end = len(coefficients)
+        while end > 1 and coefficients[end - 1] == 0:
+            end -= 1
+        self.__coefficients = tuple(coefficients[:end])
         self.__base_points: tuple = tuple(base_points)
 
     @property
@@ -121,12 +314,40 @@ class PolynomialWithBasePoint:
             and self.base_points == other.base_points
         )
 
-    @lru_cache
-    def __call__(self, x: float) -> float:
-        # Nested multiplication
-        coefficients: tuple = tuple(reversed(self.__coefficients))
-        y = coefficients[0]
-        base_points = reversed(self.__base_points)
-        for c, base_point in zip(coefficients[1:], base_points, strict=False):
+    def degree(self) -> int:
+        return len(self.__coefficients) - 1
+
+    def __call__(self, x):
+        """x can be a number or an array"""
+        # Nested multiplication, 0 * x broadcasts constant polynomials to the shape of x
+        y = self.__coefficients[-1] + 0 * x
+        for c, base_point in zip(
+            self.__coefficients[-2::-1],
+            self.__base_points[: self.degree()][::-1],
+            strict=True,
+        ):
             y = y * (x - base_point) + c
         return y
+
+    def to_polynomial(self) -> Polynomial:
+        """Convert to the monomial form, which is the cheapest to evaluate many times"""
+        polynomial = Polynomial([self.__coefficients[-1]])
+        for c, base_point in zip(
+            self.__coefficients[-2::-1],
+            self.__base_points[: self.degree()][::-1],
+            strict=True,
+        ):
+            polynomial = polynomial * Polynomial([-base_point, 1]) + Polynomial([c])
+        return polynomial
+
+    def shift(self, base_point) -> Self:
+        """Convert to the Taylor form at base_point, in which all the base points are
+        base_point"""
+        coefficients = list(self.__coefficients)
+        base_points = list(self.__base_points[: self.degree()])
+        # each pass prepends base_point to the base points and drops the last one
+        for _ in range(self.degree()):
+            for k in reversed(range(self.degree())):
+                coefficients[k] += (base_point - base_points[k]) * coefficients[k + 1]
+            base_points = [base_point] + base_points[:-1]
+        return type(self)(coefficients, base_points)
@@ -1,61 +1,199 @@
+from typing import Self
+
 import numpy
+from piecewise_polynomial import PiecewisePolynomial
 from polynomial import PolynomialWithBasePoint
+from scipy.linalg import solve_banded
+from scipy.special import comb
+
+# Bezier curves up to this degree are evaluated with Bernstein basis matrices, higher
+# degrees by de Casteljau's algorithm.
+BERNSTEIN_DEGREE_LIMIT = 32
+
+# BezierCurve.flatten halves a piece until this many uniform segments approximate it.
+FLATTEN_PIECE_SEGMENTS = 4
+
+
+def natural_cubic_spline_coefficients(points) -> tuple[numpy.ndarray, ...]:
+    """Return the arrays x, a, b, c, d, on [x[i], x[i+1]] the spline is a[i] + b[i] * (x
+    - x[i]) + c[i] * (x - x[i]) ** 2 + d[i] * (x - x[i]) ** 3"""
+    points = numpy.asarray(points, dtype=numpy.float64)
+    assert len(points) >= 2
+    x = points[:, 0]
+    y = points[:, 1]
+    x_delta = numpy.diff(x)
+    slopes = numpy.diff(y) / x_delta
+    # c[0] and c[n-1] are zeros, the others satisfy a tridiagonal system
+    c = numpy.zeros(len(points))
+    if len(points) > 2:
+        banded_A = numpy.zeros((3, len(points) - 2))
+        banded_A[0, 1:] = x_delta[1:-1]
+        banded_A[1] = 2 * (x_delta[:-1] + x_delta[1:])
+        banded_A[2, :-1] = x_delta[1:-1]
+        c[1:-1] = solve_banded((1, 1), banded_A, 3 * numpy.diff(slopes))
+    b = slopes - x_delta * (2 * c[:-1] + c[1:]) / 3
+    d = numpy.diff(c) / (3 * x_delta)
+    return x, y[:-1], b, c[:-1], d
 
 
 def natural_cubic_spline(points: list) -> list:
-    x_delta = []
-    y_delta = []
-    n = len(points)
-    for i in range(n - 1):
-        x_delta.append(points[i + 1][0] - points[i][0])
-        y_delta.append(points[i + 1][1] - points[i][1])
-
-    A = numpy.zeros((n - 1, n - 1))
-    assert A[0, 0] == 0
-    B = numpy.zeros(n - 1)
-    A[0, 0] = 1
-    for i in range(n - 2):
-        A[i + 1, i] = x_delta[i]
-        A[i + 1, i + 1] = 2 * (x_delta[i] + x_delta[i + 1])
-        if i + 2 < n - 2:
-            A[i + 1, i + 2] = x_delta[i + 1]
-        B[i + 1] = 3 * (y_delta[i + 1] / x_delta[i + 1] - y_delta[i] / x_delta[i])
-    c = numpy.linalg.solve(A, B).tolist()
-    c.append(0)
-    polynomials = []
-    for i in range(n - 1):
-        a = points[i][1]
-        b = y_delta[i] / x_delta[i] - x_delta[i] * (2 * c[i] + c[i + 1]) / 3
-        d = (c[i + 1] - c[i]) / (3 * x_delta[i])
-
-        polynomials.append(
-            PolynomialWithBasePoint(
-                coefficients=(a, b, c[i], d),
-                base_points=[points[i][0]] * 3,
-            )
+    x, a, b, c, d = natural_cubic_spline_coefficients(points)
+    return [
+        PolynomialWithBasePoint(
+            coefficients=coefficients,
+            base_points=[base_point] * 3,
+        )
+        for base_point, coefficients in zip(
+            x[:-1].tolist(), numpy.stack((a, b, c, d), axis=1).tolist(), strict=True
         )
-    return polynomials
+    ]
+
+
+def natural_cubic_spline_interpolant(points) -> PiecewisePolynomial:
+    """The natural cubic spline as one object, which evaluates the spline and its
+    derivatives over arrays"""
+    x, a, b, c, d = natural_cubic_spline_coefficients(points)
+    return PiecewisePolynomial(x, numpy.stack((a, b, c, d), axis=1))
+
+
+def bernstein_matrix(degree: int, t) -> numpy.ndarray:
+    """The values of the Bernstein basis polynomials of degree at the parameters t, in
+    an array of shape (len(t), degree + 1)"""
+    t = numpy.asarray(t, dtype=numpy.float64).reshape(-1, 1)
+    k = numpy.arange(degree + 1)
+    return comb(degree, k) * t**k * (1 - t) ** (degree - k)
+
+
+def batch_evaluate_bezier_curves(control_points, t) -> numpy.ndarray:
+    """Evaluate curves of the same degree at the parameters t at once, control_points
+    has shape (curve number, degree + 1, dimension) and the result has shape (curve
+    number, len(t), dimension)"""
+    control_points = numpy.asarray(control_points, dtype=numpy.float64)
+    t = numpy.asarray(t, dtype=numpy.float64).reshape(-1)
+    assert numpy.all((t >= 0) & (t <= 1))
+    degree = control_points.shape[-2] - 1
+    if degree <= BERNSTEIN_DEGREE_LIMIT:
+        return bernstein_matrix(degree, t) @ control_points
+    # de Casteljau's algorithm for all the curves and parameters at once
+    t = t.reshape(-1, 1, 1)
+    points = control_points[..., None, :, :]
+    while points.shape[-2] > 1:
+        points = (1 - t) * points[..., :-1, :] + t * points[..., 1:, :]
+    return points[..., 0, :]
 
 
 class BezierCurve:
     def __init__(self, control_points: list):
-        self.__control_points = tuple(numpy.array(p) for p in control_points)
+        self.__control_points = numpy.array(control_points, dtype=numpy.float64)
+
+    @property
+    def control_points(self) -> numpy.ndarray:
+        return self.__control_points
 
-    def __call__(self, t: float):
+    def degree(self) -> int:
+        return len(self.__control_points) - 1
+
+    def __call__(self, t):
+        """t can be a number or an array"""
+        t = numpy.asarray(t, dtype=numpy.float64)
+        point_shape = self.__control_points.shape[1:]
+        points = batch_evaluate_bezier_curves(
+            self.__control_points.reshape(len(self.__control_points), -1), t
+        )
+        return points.reshape(t.shape + point_shape)[()]
+
+    def split(self, t: float) -> tuple[Self, Self]:
+        """Subdivide at t into the curves on [0,t] and [t,1], each reparameterized to
+        [0,1]"""
         assert 0 <= t <= 1
-        tmp = list(self.__control_points)
-        while len(tmp) >= 2:
-            for i in range(len(tmp) - 1):
-                tmp[i] = (1 - t) * tmp[i] + t * tmp[i + 1]
-            tmp.pop()
-        return tmp[0]
+        left, right = self.__split_control_points(self.__control_points[None], t)
+        return BezierCurve(left[0]), BezierCurve(right[0])
+
+    @staticmethod
+    def __split_control_points(control_points: numpy.ndarray, t: float):
+        """de Casteljau subdivision of the curves in the first axis of control_points,
+        the first and last points of the levels of the triangle are the control
+        points of the two halves"""
+        left = [control_points[:, 0]]
+        right = [control_points[:, -1]]
+        points = control_points
+        while points.shape[1] > 1:
+            points = (1 - t) * points[:, :-1] + t * points[:, 1:]
+            left.append(points[:, 0])
+            right.append(points[:, -1])
+        return numpy.stack(left, axis=1), numpy.stack(right[::-1], axis=1)
+
+    def flatten(self, tolerance: float, max_depth: int = 32) -> numpy.ndarray:
+        """Approximate the curve by a polyline within tolerance, so that flat parts get
+        few points. Return the vertices in an array."""
+        assert tolerance > 0
+        point_shape = self.__control_points.shape[1:]
+        pieces = self.__control_points.reshape(len(self.__control_points), -1)[None]
+        for _ in range(max_depth + 1):
+            # A piece of degree n is within n(n-1)/8 * max|P[i-1] - 2P[i] + P[i+1]| of
+            # the segment between its end points, and within bound / k**2 of the
+            # polyline through k + 1 uniform parameters, so the halving stops once
+            # FLATTEN_PIECE_SEGMENTS segments suffice for a piece.
+            bounds = self.__flatness_bounds(pieces)
+            flat = bounds <= tolerance * FLATTEN_PIECE_SEGMENTS**2
+            if numpy.all(flat):
+                break
+            left, right = self.__split_control_points(pieces[~flat], 0.5)
+            # keep the pieces in order, each split piece is replaced by its halves
+            counts = numpy.where(flat, 1, 2)
+            positions = numpy.cumsum(counts) - counts
+            new_pieces = numpy.empty(
+                (len(pieces) + len(left),) + pieces.shape[1:], dtype=pieces.dtype
+            )
+            new_pieces[positions[flat]] = pieces[flat]
+            new_pieces[positions[~flat]] = left
+            new_pieces[positions[~flat] + 1] = right
+            pieces = new_pieces
+        else:
+            raise RuntimeError(
+                f"not flat within {tolerance} after {max_depth} halvings"
+            )
+        segments = numpy.maximum(numpy.ceil(numpy.sqrt(bounds / tolerance)), 1).astype(
+            int
+        )
+        # the start parameters of the segments of all the pieces
+        indices = numpy.repeat(numpy.arange(len(pieces)), segments)
+        t = (
+            numpy.arange(len(indices))
+            - numpy.repeat(numpy.cumsum(segments) - segments, segments)
+        ) / segments[indices]
+        basis = bernstein_matrix(pieces.shape[1] - 1, t)
+        vertices = numpy.concatenate(
+            (numpy.einsum("ij,ijk->ik", basis, pieces[indices]), pieces[-1:, -1])
+        )
+        return vertices.reshape((-1,) + point_shape)
+
+    @staticmethod
+    def __flatness_bounds(pieces: numpy.ndarray) -> numpy.ndarray:
+        """Bound the distances of the curves in the first axis of pieces to the
+        segments between their end points"""
+        degree = pieces.shape[1] - 1
+        if degree < 2:
+            return numpy.zeros(len(pieces))
+        second_differences = pieces[:, :-2] - 2 * pieces[:, 1:-1] + pieces[:, 2:]
+        return (
+            degree
+            * (degree - 1)
+            / 8
+            * numpy.max(numpy.linalg.norm(second_differences, axis=2), axis=1)
+        )
 
     def degree_elevation(self):
         n = len(self.__control_points)
-        new_control_points = list(self.__control_points)
-        new_control_points.append(new_control_points[-1])
-        for i in range(1, n):
-            new_control_points[i] = (
-                i * self.__control_points[i - 1] + (n - i) * self.__control_points[i]
-            ) / n
-        return BezierCurve(new_control_points)
+        ratios = (numpy.arange(n + 1) / n).reshape(
+            (-1,) + (1,) * (self.__control_points.ndim - 1)
+        )
+        # the first and last control points are kept, the others are interpolated
+        # between neighbours
+        previous_points = numpy.concatenate(
+            (self.__control_points[:1], self.__control_points)
+        )
+        next_points = numpy.concatenate(
+            (self.__control_points, self.__control_points[-1:])
+        )
+        return BezierCurve(ratios * previous_points + (1 - ratios) * next_points)
@@ -1,4 +1,10 @@
-from b_spline import BSpline, KnotVector
+import gc
+import sys
+import weakref
+
+import numpy
+import pytest
+from b_spline import BSpline, KnotVector, Polynomial
 
 
 def test_eval():
@@ -12,3 +18,171 @@ def test_eval():
 def test_basis_function():
     knot_vector = KnotVector([-1, 0, 0, 1, 1, 2, 3, 4], degree=2)
     assert knot_vector.evaluate_base_function(t=1, index=2, degree=2) == 1
+
+
+def test_eval_array():
+    # control points at the Greville abscissae reproduce the identity
+    spline = BSpline(
+        points=[0, 1 / 3, 5 / 3, 10 / 3, 14 / 3, 5],
+        knot_vector=[0, 0, 0, 0, 1, 4, 5, 5, 5, 5],
+        degree=3,
+    )
+    t = numpy.linspace(0, 5, 101)
+    res = spline(t)
+    assert res.shape == (101, 1)
+    assert numpy.allclose(res[:, 0], t)
+
+    spline = BSpline(
+        points=[(0, 1), (1, 3), (2, 2), (3, 5), (4, 1), (5, 0)],
+        knot_vector=[0, 0, 0, 0, 1, 4, 5, 5, 5, 5],
+        degree=3,
+    )
+    res = spline.evaluate(t)
+    assert res.shape == (101, 2)
+    for i in (0, 37, 100):
+        assert res[i].tolist() == pytest.approx(spline(t[i]))
+    with pytest.raises(RuntimeError):
+        spline.evaluate([6])
+
+
+def test_find_span():
+    knot_vector = KnotVector([0, 0, 0, 0, 1, 4, 5, 5, 5, 5], degree=3)
+    assert knot_vector.find_span(0) == 3
+    assert knot_vector.find_span(1) == 4
+    assert knot_vector.find_span(1, right_closed=True) == 3
+    assert knot_vector.find_span(5, right_closed=True) == 5
+    assert knot_vector.get_parameter_index(4.5, point_num=6) == 5
+    with pytest.raises(RuntimeError):
+        knot_vector.find_span(-1)
+    assert knot_vector.find_spans(
+        numpy.array([0, 0.5, 1, 4, 5]), right_closed=True
+    ).tolist() == [3, 3, 3, 4, 5]
+    assert knot_vector.find_spans(numpy.array([0, 0.5, 1, 4])).tolist() == [
+        3,
+        3,
+        4,
+        5,
+    ]
+
+
+def test_basis_matrix():
+    knot_vector = KnotVector([0, 0, 0, 0, 0.2, 0.5, 0.5, 0.7, 1, 1, 1, 1], degree=3)
+    t = numpy.linspace(0, 1, 11)
+    for derivative_degree in range(3):
+        matrix = knot_vector.basis_matrix(t, derivative_degree=derivative_degree)
+        assert matrix.shape == (11, 8)
+        assert max(matrix.getnnz(axis=1)) <= 4
+        for i in (0, 3, 8, 10):
+            for index in range(8):
+                assert matrix[i, index] == pytest.approx(
+                    knot_vector.evaluate_base_function_derivative(
+                        t=t[i],
+                        index=index,
+                        degree=3,
+                        derivative_degree=derivative_degree,
+                    ),
+                    abs=1e-9,
+                )
+    assert numpy.allclose(knot_vector.basis_matrix(t).sum(axis=1), 1)
+
+
+def test_interned_knots(monkeypatch):
+    monkeypatch.setattr(
+        sys.modules[Polynomial.__module__], "INTERNED_POLYNOMIAL_LIMIT", 32
+    )
+    knot_vector = KnotVector([0, 0, 0, 0, 0.2, 0.5, 0.5, 0.7, 1, 1, 1, 1], degree=3)
+    knot = knot_vector.get_knot(7)
+    for t in numpy.linspace(0, 0.2, 100):
+        knot_vector.evaluate_base_function(t=t, index=0, degree=3)
+    # the parameters do not push the knots out of the table
+    assert knot_vector.get_knot(7) is knot
+
+
+def test_cache():
+    knot_vector = KnotVector([-1, 0, 0, 1, 1, 2, 3, 4], degree=2, cache_size=8)
+    other_knot_vector = KnotVector([-1, 0, 0, 1, 1, 2, 3, 4], degree=2)
+    knot_vector.evaluate_base_function(t=1, index=2, degree=2)
+    hits, misses, _, _ = knot_vector.cache_info()
+    assert misses > 0
+    knot_vector.evaluate_base_function(t=1, index=2, degree=2)
+    assert knot_vector.cache_info().hits == hits + 1
+    assert knot_vector.cache_info().misses == misses
+    assert knot_vector.cache_info().currsize <= 8
+    assert other_knot_vector.cache_info().currsize == 0
+    knot_vector.cache_clear()
+    assert knot_vector.cache_info().currsize == 0
+
+
+def test_cache_release():
+    gc.disable()
+    try:
+        knot_vector = KnotVector([-1, 0, 0, 1, 1, 2, 3, 4], degree=2)
+        knot_vector.evaluate_base_function(t=1, index=2, degree=2)
+        assert knot_vector.cache_info().currsize > 0
+        # the first span is empty, so the spline is evaluated with epsilon knots
+        spline = BSpline(
+            points=[0, 1, 2, 3, 4], knot_vector=[0, 0, 0, 0, 1, 2, 3, 3], degree=2
+        )
+        spline(0)
+        assert spline.cache_info().currsize > 0
+        references = [weakref.ref(knot_vector), weakref.ref(spline)]
+        del knot_vector, spline
+        # the instances are freed by reference counting alone
+        assert all(reference() is None for reference in references)
+    finally:
+        gc.enable()
+
+
+def test_compile():
+    spline = BSpline(
+        points=[(0, 1), (1, 3), (2, 2), (3, 5), (4, 1), (5, 0), (2, 2)],
+        knot_vector=[0, 0, 0, 0, 1, 1, 4, 5, 5, 5, 5],
+        degree=3,
+    )
+    compiled_spline = spline.compile()
+    assert compiled_spline.breakpoints.tolist() == [0, 1, 4, 5]
+    assert compiled_spline.coefficients.shape == (3, 4, 2)
+    t = numpy.linspace(0, 5, 101)
+    assert numpy.allclose(compiled_spline(t), spline(t))
+
+
+def test_high_degree_basis_function():
+    degree = 5
+    knot_vector = KnotVector(
+        [0] * (degree + 1) + [0.2, 0.35, 0.5, 0.8] + [1] * (degree + 1),
+        degree=degree,
+    )
+    t = numpy.array([0, 0.3, 1])
+    matrix = knot_vector.basis_matrix(t, derivative_degree=1).toarray()
+    for i in range(len(t)):
+        for index in range(matrix.shape[1]):
+            assert matrix[i, index] == pytest.approx(
+                knot_vector.evaluate_base_function_derivative(
+                    t=t[i], index=index, degree=degree, derivative_degree=1
+                ),
+                abs=1e-9,
+            )
+
+
+def test_derivative():
+    spline = BSpline(
+        points=[0, 1 / 3, 5 / 3, 10 / 3, 14 / 3, 5],
+        knot_vector=[0, 0, 0, 0, 1, 4, 5, 5, 5, 5],
+        degree=3,
+    )
+    t = numpy.linspace(0, 5, 51)
+    assert numpy.allclose(spline.derivative()(t), 1)
+    assert numpy.allclose(spline.derivative(2)(t), 0)
+
+    spline = BSpline(
+        points=[(0, 1), (1, 3), (2, 2), (3, 5), (4, 1), (5, 0), (2, 2)],
+        knot_vector=[0, 0, 0, 0, 1, 1, 4, 5, 5, 5, 5],
+        degree=3,
+    )
+    compiled_spline = spline.compile()
+    # the second derivative jumps at the double knot 1
+    t = numpy.linspace(0.05, 4.95, 50)
+    for order in (1, 2):
+        assert numpy.allclose(
+            spline.derivative(order)(t), compiled_spline.derivative(order)(t)
+        )
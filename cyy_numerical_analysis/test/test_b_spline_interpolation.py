@@ -0,0 +1,45 @@
+import numpy
+import pytest
+from b_spline_interpolation import (
+    B_spline_interpolation,
+    batch_B_spline_interpolation,
+    chord_length_parameterization,
+    parameterize,
+)
+
+
+def test_B_spline_interpolation():
+    for points in (
+        numpy.array([(0, 0), (1, 2), (2, 1), (4, 3), (5, 0), (7, 1)]),
+        numpy.array([(0, 0, 1), (1, 2, 0), (2, 1, 1), (4, 3, 3), (5, 0, 1)]),
+    ):
+        spline = B_spline_interpolation(list(points.astype(float)))
+        parameters = spline.knot_vector[3 : 3 + len(points)]
+        assert numpy.allclose(spline(numpy.array(parameters)), points)
+
+
+def test_parameterize():
+    points = numpy.array([(0, 0), (3, 4), (3, 4.1), (3, 5)])
+    assert parameterize(points).tolist() == pytest.approx([0, 5 / 6, 5.1 / 6, 1])
+    assert parameterize(points, method="uniform").tolist() == pytest.approx(
+        [0, 1 / 3, 2 / 3, 1]
+    )
+    parameters = parameterize(points, method="centripetal")
+    assert parameters[-1] == 1
+    assert numpy.all(numpy.diff(parameters) > 0)
+    assert chord_length_parameterization(list(points), degree=2)[:3] == [0, 0, 0]
+
+
+def test_batch_B_spline_interpolation():
+    t = numpy.array([0, 1, 2.5, 3, 4.5, 6])
+    points = numpy.stack(
+        [numpy.stack([t, numpy.sin(t + phase)], axis=1) for phase in (0, 1, 2)]
+    )
+    splines = batch_B_spline_interpolation(points, parameters=t)
+    assert len(splines) == 3
+    for spline, curve_points in zip(splines, points, strict=True):
+        assert numpy.allclose(spline(t), curve_points)
+    splines = batch_B_spline_interpolation(points[:, :, 1], parameters=t)
+    assert numpy.allclose(splines[1](t)[:, 0], points[1, :, 1])
+    with pytest.raises(AssertionError):
+        batch_B_spline_interpolation(points, parameters=t, degree=4)
@@ -0,0 +1,41 @@
+import discrete_fourier_transform_fit
+import numpy as np
+from discrete_fourier_transform_fit import (
+    DFF_interpolation,
+    DFF_resampling,
+    batch_DFF_interpolation,
+)
+
+
+def f(x):
+    return np.exp(np.sin(2 * np.pi * x)) + x
+
+
+def test_DFF_interpolation():
+    n = 16
+    P = DFF_interpolation(f, n, 1, 3)
+    t = 1 + 2 * np.arange(n) / n
+    assert np.allclose(P(t), f(np.arange(n) / n))
+    assert np.allclose(P(t.reshape(2, -1)), P(t).reshape(2, -1))
+    assert np.isclose(P(t[3]), P(t)[3])
+
+
+def test_DFF_resampling():
+    n = 16
+    P = DFF_interpolation(f, n, 1, 3)
+    for m in (5, n, 3 * n + 1):
+        assert np.allclose(DFF_resampling(f, n, m), P(1 + 2 * np.arange(m) / m))
+
+
+def test_batch_DFF_interpolation(monkeypatch):
+    n = 16
+    P = DFF_interpolation(f, n, 1, 3)
+    samples = np.stack([f(np.arange(n) / n) * scale for scale in (1, 2, 3)])
+    Q = batch_DFF_interpolation(samples, 1, 3)
+    t = np.linspace(1, 3, 7)
+    assert Q(t).shape == (3, 7)
+    assert Q(2.0).shape == (3,)
+    assert np.allclose(Q(t), np.stack([P(t) * scale for scale in (1, 2, 3)]))
+    # the angles are computed in chunks of a few points
+    monkeypatch.setattr(discrete_fourier_transform_fit, "DFF_CHUNK_SIZE", 20)
+    assert np.allclose(Q(t), np.stack([P(t) * scale for scale in (1, 2, 3)]))
@@ -1,8 +1,10 @@
 import math
 
+import numpy
 import pytest
 from integration import (
     adaptive_quadrature,
+    composite_integration,
     composite_midpoint_rule,
     composite_simpson_rule,
     composite_trapezoid_rule,
@@ -55,3 +57,17 @@ def test_adaptive_quadrature():
     assert adaptive_quadrature(
         lambda x: (1 + math.sin(math.e ** (3 * x))), -1, 1, 0.005
     ) == pytest.approx(2.502, abs=0.001)
+
+
+def test_vectorized_composite_rules():
+    for rule in (
+        composite_trapezoid_rule,
+        composite_simpson_rule,
+        composite_midpoint_rule,
+    ):
+        assert rule(numpy.log, 1, 2, m=4, vectorized=True) == pytest.approx(
+            rule(math.log, 1, 2, m=4)
+        )
+    assert composite_integration(
+        numpy.log, 1, 2, 4, three_point_rule, vectorized=True
+    ) == pytest.approx(composite_integration(math.log, 1, 2, 4, three_point_rule))
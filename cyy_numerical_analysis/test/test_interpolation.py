@@ -1,7 +1,12 @@
 import math
 
+import numpy
 from interpolation import (
+    BarycentricInterpolant,
+    ChebyshevApproximation,
+    NewtonInterpolant,
     chebyshev_base_points,
+    chebyshev_points,
     lagrange_interpolating,
     newton_divided_difference,
 )
@@ -14,6 +19,19 @@ def test_lagrange_interpolating():
     assert f(3) == 4
 
 
+def test_barycentric_interpolant():
+    f = BarycentricInterpolant.from_chebyshev_points(numpy.exp, -1, 3, 50)
+    x = numpy.linspace(-1, 3, 101).reshape(-1, 1)
+    assert f(x).shape == x.shape
+    assert numpy.allclose(f(x), numpy.exp(x), rtol=1e-13)
+    assert f(f.base_points[7]) == f.values[7]
+    # the same weights up to a common factor
+    g = BarycentricInterpolant(f.base_points, f.values)
+    assert numpy.allclose(g.weights / g.weights[0], f.weights / f.weights[0])
+    f.set_values(numpy.stack([numpy.sin(f.base_points), numpy.cos(f.base_points)], 1))
+    assert numpy.allclose(f(0.5), [math.sin(0.5), math.cos(0.5)])
+
+
 def test_newton_divided_difference():
     f = newton_divided_difference([(0, 1), (2, 2), (3, 4)])
     assert f(0) == 1
@@ -21,6 +39,16 @@ def test_newton_divided_difference():
     assert f(3) == 4
 
 
+def test_newton_interpolant():
+    points = [(0, 1), (2, 2), (3, 4), (-1, 0.5), (5, -3)]
+    interpolant = NewtonInterpolant(points[:2])
+    for i, (x, y) in enumerate(points[2:], start=3):
+        polynomial = interpolant.add_point(x, y)
+        assert polynomial == newton_divided_difference(points[:i])
+        for p in points[:i]:
+            assert math.isclose(polynomial(p[0]), p[1])
+
+
 def test_chebyshev_base_points():
     a = 0
     b = math.pi / 2
@@ -30,3 +58,16 @@ def test_chebyshev_base_points():
     assert math.fabs(math.sin(b / 2) - P(b / 2)) <= (
         (((b - a) / 2) ** n) / (math.factorial(n) * (2 ** (n - 1)))
     )
+    assert len(base_points) == n
+    assert [x for x, _ in base_points] == chebyshev_points(a, b, n).tolist()
+
+
+def test_chebyshev_approximation():
+    f = ChebyshevApproximation.fit(numpy.exp, -1, 3)
+    x = numpy.linspace(-1, 3, 101)
+    assert numpy.allclose(f(x), numpy.exp(x), rtol=1e-13)
+    assert f.degree() < 30
+    assert math.isclose(f(0.5), math.exp(0.5))
+    g = ChebyshevApproximation.fit(numpy.cos, 0, 1, n=5)
+    assert g.degree() == 4
+    assert abs(g(0.3) - math.cos(0.3)) < 1e-4
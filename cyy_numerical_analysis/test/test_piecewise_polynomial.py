@@ -0,0 +1,23 @@
+import numpy
+import pytest
+from piecewise_polynomial import PiecewisePolynomial
+
+
+def test_piecewise_polynomial():
+    # x^2 on [0, 1] and 1 + 2(x-1) on [1, 3]
+    f = PiecewisePolynomial(breakpoints=[0, 1, 3], coefficients=[[0, 0, 1], [1, 2, 0]])
+    assert f.degree() == 2
+    assert f(0.5) == 0.25
+    assert f(numpy.array([0, 1, 2, 3])).tolist() == [0, 1, 3, 5]
+    assert f.derivative()(numpy.array([0.5, 2])).tolist() == [1, 2]
+    assert f.derivative(3)(2) == 0
+    assert f(numpy.array([0.5, 2]), derivative_order=1).tolist() == [1, 2]
+    assert f(0.5, derivative_order=2) == 2
+    assert f(0.5, derivative_order=3) == 0
+    with pytest.raises(RuntimeError):
+        f(4)
+
+
+def test_piecewise_polynomial_curve():
+    f = PiecewisePolynomial(breakpoints=[0, 1], coefficients=[[[1, 2], [1, 0], [0, 1]]])
+    assert f(numpy.array([0, 1])).tolist() == [[1, 2], [2, 3]]
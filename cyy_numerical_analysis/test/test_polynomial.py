@@ -1,4 +1,13 @@
-from polynomial import Polynomial
+from fractions import Fraction
+
+import numpy
+from polynomial import (
+    INTERNED_POLYNOMIAL_LIMIT,
+    Polynomial,
+    PolynomialWithBasePoint,
+    batch_multiply,
+    batch_roots,
+)
 
 
 def test_polynomial():
@@ -19,3 +28,104 @@ def test_polynomial():
     h = f / 2
     assert h(1) == f(1) / 2
     assert h(2) == f(2) / 2
+
+
+def test_polynomial_division():
+    f = Polynomial([-1, 0, 1])
+    g = Polynomial([1, 1])
+    q, r = divmod(f, g)
+    assert q == Polynomial([-1, 1])
+    assert r == Polynomial([0])
+    assert f // Polynomial([2, 1]) == Polynomial([-2, 1])
+    assert f % Polynomial([2, 1]) == Polynomial([3])
+    assert f.gcd(Polynomial([-1, 0, 0, 1])) == Polynomial([-1, 1])
+    assert f.gcd(Polynomial([2, 1])) == Polynomial([1])
+
+
+def test_polynomial_array_evaluation():
+    f = Polynomial([1, 2, 3])
+    x = numpy.linspace(-1, 1, 5)
+    assert f(x).tolist() == [1 + 2 * v + 3 * v**2 for v in x.tolist()]
+    assert Polynomial([2])(x).tolist() == [2] * 5
+    assert f.derivative()(x).tolist() == (2 + 6 * x).tolist()
+    assert f.coefficient_array.dtype == numpy.float64
+    cached_f = f.cached(maxsize=2)
+    assert cached_f(2) == 17
+    assert cached_f(2) == 17
+    assert cached_f.cache_info().hits == 1
+
+
+def test_fft_multiplication():
+    rng = numpy.random.default_rng(0)
+    f = Polynomial(rng.random(1000))
+    g = Polynomial(rng.random(700))
+    h = f * g
+    assert h.degree() == 1698
+    assert numpy.allclose(
+        h.coefficient_array,
+        numpy.convolve(f.coefficient_array, g.coefficient_array),
+    )
+
+
+def test_batch_multiply():
+    rng = numpy.random.default_rng(0)
+    for length, other_length in ((5, 4), (600, 4), (600, 520)):
+        a = rng.random((3, length))
+        b = rng.random((3, other_length))
+        products = batch_multiply(a, b)
+        assert products.shape == (3, length + other_length - 1)
+        for i in range(3):
+            assert numpy.allclose(products[i], numpy.convolve(a[i], b[i]))
+    assert numpy.allclose(batch_multiply(a, b[0]), batch_multiply(a, b[[0, 0, 0]]))
+
+
+def test_interned_polynomial():
+    assert not hasattr(Polynomial([1, 2]), "__dict__")
+    assert Polynomial.interned([1.0, 2.0]) is Polynomial.interned([1.0, 2.0])
+    exact = Polynomial.interned([Fraction(1)])
+    assert exact is not Polynomial.interned([1.0])
+    assert isinstance(exact.coefficients[0], Fraction)
+    assert Polynomial.interned([1, 2, 3]) == Polynomial([1, 2, 3])
+    linear = Polynomial.interned([1.0, 2.0])
+    for c in range(INTERNED_POLYNOMIAL_LIMIT):
+        Polynomial.interned([float(c), 3.0])
+        # the recently used polynomials stay in the table
+        assert Polynomial.interned([1.0, 2.0]) is linear
+    Polynomial.clear_interned()
+    assert Polynomial.interned([1.0, 2.0]) is not linear
+
+
+def test_polynomial_with_base_point():
+    p = PolynomialWithBasePoint([1.0, 2.0, -3.0, 0.5, 0.0], [0.3, -1.0, 2.0, 5.0])
+    x = numpy.linspace(-2, 3, 11)
+    expected = [
+        1
+        + 2 * (t - 0.3)
+        - 3 * (t - 0.3) * (t + 1)
+        + 0.5 * (t - 0.3) * (t + 1) * (t - 2)
+        for t in x
+    ]
+    assert numpy.allclose(p(x), expected)
+    assert p(x[3]) == p(x)[3]
+    assert numpy.allclose(p.to_polynomial()(x), expected)
+    shifted = p.shift(1.25)
+    assert shifted.base_points == (1.25,) * 3
+    assert numpy.allclose(shifted(x), expected)
+
+
+def test_roots():
+    assert numpy.allclose(Polynomial([-6, 11, -6, 1]).roots(), [1, 2, 3])
+    assert numpy.allclose(Polynomial([1, -2, 1]).roots(polish_steps=2), [1, 1])
+    assert len(Polynomial([5]).roots()) == 0
+    coefficients = numpy.random.default_rng(0).normal(size=(100, 4, 5))
+    roots = batch_roots(coefficients, polish_steps=1)
+    assert roots.shape == (100, 4, 4)
+    for c, r in zip(coefficients.reshape(-1, 5), roots.reshape(-1, 4), strict=True):
+        assert numpy.allclose(
+            numpy.sort_complex(r), numpy.sort_complex(Polynomial(c).roots())
+        )
+        # residuals relative to the magnitudes of the terms
+        assert numpy.all(
+            numpy.abs(Polynomial(c)(r))
+            <= 1e-12 * Polynomial(numpy.abs(c))(numpy.abs(r))
+        )
@@ -1,8 +1,16 @@
 import numpy
 import pytest
+from scipy.interpolate import CubicSpline
 
 from cyy_numerical_analysis.polynomial import PolynomialWithBasePoint
-from cyy_numerical_analysis.spline import BezierCurve, natural_cubic_spline
+from cyy_numerical_analysis.spline import (
+    BezierCurve,
+    batch_evaluate_bezier_curves,
+    bernstein_matrix,
+    natural_cubic_spline,
+    natural_cubic_spline_coefficients,
+    natural_cubic_spline_interpolant,
+)
 
 
 def test_natural_cubic_spline():
@@ -10,6 +18,29 @@ def test_natural_cubic_spline():
     assert polynomials[0] == PolynomialWithBasePoint([3.0, -7.0, 0.0, 2.0], [0.0] * 3)
 
 
+def test_natural_cubic_spline_coefficients():
+    points = [(0, 3), (1, -2), (2, 1), (3.5, 0), (4, 2), (6, 1)]
+    x, a, b, c, d = natural_cubic_spline_coefficients(points)
+    expected = CubicSpline(
+        [p[0] for p in points], [p[1] for p in points], bc_type="natural"
+    )
+    assert numpy.allclose(numpy.stack((d, c, b, a)), expected.c)
+    for polynomial, x_0 in zip(natural_cubic_spline(points), x, strict=False):
+        assert polynomial(x_0 + 0.3) == pytest.approx(expected(x_0 + 0.3))
+
+
+def test_natural_cubic_spline_interpolant():
+    points = [(0, 3), (1, -2), (2, 1), (3.5, 0), (4, 2), (6, 1)]
+    f = natural_cubic_spline_interpolant(points)
+    expected = CubicSpline(
+        [p[0] for p in points], [p[1] for p in points], bc_type="natural"
+    )
+    x = numpy.linspace(0, 6, 25)
+    for derivative_order in range(3):
+        assert numpy.allclose(f(x, derivative_order), expected(x, derivative_order))
+    assert f(6) == 1
+
+
 def test_bezier_curve():
     f = BezierCurve([(1, 1), (1, 3), (3, 3), (2, 2)])
     assert numpy.all(f(0) == numpy.array([1, 1]))
@@ -27,3 +58,59 @@ def test_bezier_curve():
     while t <= 1:
         assert numpy.linalg.norm(f2(t) - f(t)) == pytest.approx(0, abs=0.000000001)
         t += 0.1
+
+
+def test_bezier_curve_array():
+    f = BezierCurve([(1, 1), (1, 3), (3, 3), (2, 2)])
+    t = numpy.linspace(0, 1, 11)
+    expected = numpy.stack(
+        [1 + 6 * t**2 - 5 * t**3, 1 + 6 * t - 6 * t**2 + t**3], axis=1
+    )
+    assert numpy.allclose(f(t), expected)
+    control_points = numpy.random.default_rng(0).normal(size=(5, 41, 3))
+    points = batch_evaluate_bezier_curves(control_points, t)
+    assert points.shape == (5, 11, 3)
+    # degree 40 is evaluated by de Casteljau's algorithm, compare with the Bernstein
+    # basis
+    for curve_control_points, curve_points in zip(control_points, points, strict=True):
+        assert numpy.allclose(
+            bernstein_matrix(40, t) @ curve_control_points, curve_points
+        )
+
+
+def test_bezier_curve_split():
+    f = BezierCurve([(1, 1), (1, 3), (3, 3), (2, 2)])
+    left, right = f.split(0.3)
+    t = numpy.linspace(0, 1, 11)
+    assert numpy.allclose(left(t), f(0.3 * t))
+    assert numpy.allclose(right(t), f(0.3 + 0.7 * t))
+
+
+def __polyline_distance(f, polyline) -> float:
+    """The largest distance of points on the curve to the polyline"""
+    points = f(numpy.linspace(0, 1, 2001))
+    starts = polyline[:-1]
+    segments = polyline[1:] - starts
+    offsets = points[:, None] - starts
+    ratios = numpy.clip(
+        numpy.sum(offsets * segments, axis=2) / numpy.sum(segments**2, axis=1), 0, 1
+    )
+    distances = numpy.linalg.norm(offsets - ratios[..., None] * segments, axis=2)
+    return float(numpy.max(numpy.min(distances, axis=1)))
+
+
+def test_bezier_curve_flatten():
+    f = BezierCurve([(1, 1), (1, 3), (3, 3), (2, 2)])
+    polyline = f.flatten(tolerance=0.001)
+    assert numpy.all(polyline[0] == f(0))
+    assert numpy.all(polyline[-1] == f(1))
+    assert __polyline_distance(f, polyline) <= 0.001
+    # a curve with uneven curvature needs fewer points than uniform sampling
+    f = BezierCurve([(0, 0), (1, 2), (2, -1), (3, 3), (4, 0), (5, 1), (6, 0)])
+    polyline = f.flatten(tolerance=0.001)
+    error = __polyline_distance(f, polyline)
+    assert error <= 0.001
+    assert __polyline_distance(f, f(numpy.linspace(0, 1, len(polyline)))) > error
+    with pytest.raises(RuntimeError):
+        f.flatten(tolerance=1e-12, max_depth=2)
+    assert len(BezierCurve([(0, 0), (1, 1), (2, 2)]).flatten(tolerance=0.001)) == 2